@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ABlogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "a_blog"
+
+    def ready(self):
+        import a_blog.signals
@@ -0,0 +1,88 @@
+import gzip
+import re
+
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# encodings in order of preference when the client weighs them equally;
+# brotli and zstd are only offered when their packages are installed
+ENCODERS = {}
+if brotli is not None:
+    ENCODERS['br'] = lambda data: brotli.compress(data, quality=5)
+if zstandard is not None:
+    ENCODERS['zstd'] = zstandard.ZstdCompressor(level=10).compress
+ENCODERS['gzip'] = lambda data: gzip.compress(data, compresslevel=6, mtime=0)
+
+FIND_RAW = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.S | re.I)
+FIND_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.S)
+FIND_LINE_BREAK = re.compile(r'\s*\n\s*')
+FIND_SPACES = re.compile(r'[ \t]{2,}')
+FIND_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+FIND_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_markup(markup):
+    markup = FIND_COMMENT.sub('', markup)
+    # a line break renders like a space, so keep one where any whitespace run had one
+    markup = FIND_LINE_BREAK.sub('\n', markup)
+    return FIND_SPACES.sub(' ', markup)
+
+
+def minify_style(block):
+    block = FIND_CSS_COMMENT.sub('', block)
+    block = re.sub(r'\s+', ' ', block)
+    return FIND_CSS_PUNCTUATION.sub(r'\1', block)
+
+
+def minify_html(html):
+    """
+    Drop comments and indentation from HTML. Whitespace inside pre,
+    textarea and script is kept as is; style blocks are collapsed.
+    """
+    parts = []
+    position = 0
+    for match in FIND_RAW.finditer(html):
+        parts.append(minify_markup(html[position:match.start()]))
+        block = match.group(0)
+        parts.append(minify_style(block) if match.group(1).lower() == 'style' else block)
+        position = match.end()
+    parts.append(minify_markup(html[position:]))
+    return ''.join(parts)
+
+
+def negotiate(accept_encoding, encodings=ENCODERS):
+    """Pick the encoding with the highest q-value the client accepts."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0
+        accepted[coding.strip().lower()] = quality
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, padded=False):
+    if padded:
+        # Django's gzip with random filename padding, against BREACH on
+        # responses that carry a CSRF token
+        return compress_string(data, max_random_bytes=100)
+    return ENCODERS[encoding](data)
@@ -0,0 +1,59 @@
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from wagtail.embeds import embeds
+from wagtail.embeds.exceptions import EmbedException
+from wagtail.embeds.rich_text import MediaEmbedHandler
+from wagtail.rich_text.rewriters import FIND_EMBED_TAG, extract_attrs
+
+EMBED_KEY = 'blog:embed:%s'
+EMBED_CACHE_TIMEOUT = getattr(settings, 'BLOG_EMBED_CACHE_TIMEOUT', 60 * 60 * 24 * 30)
+EMBED_FAILURE_TIMEOUT = getattr(settings, 'BLOG_EMBED_FAILURE_TIMEOUT', 60 * 5)
+
+FIND_IFRAME = re.compile(r'<iframe\b(?![^>]*\bloading=)', re.IGNORECASE)
+
+
+def embed_urls(html):
+    for match in FIND_EMBED_TAG.finditer(html or ''):
+        attrs = extract_attrs(match.group(1))
+        if attrs.get('embedtype') == 'media' and attrs.get('url'):
+            yield attrs['url']
+
+
+def render_embed(url, retry_failed=False):
+    """
+    Return the front-end HTML for an embed URL. Resolved embeds are kept
+    in the cache, so rendering an article never waits on the provider once
+    the embed has been seen (or pre-resolved on publish). Failures are
+    remembered for EMBED_FAILURE_TIMEOUT so a dead or slow provider is
+    not called again on every render.
+    """
+    key = EMBED_KEY % embeds.get_embed_hash(url)
+    html = cache.get(key)
+    if html is not None and not (retry_failed and html == ''):
+        return html
+    try:
+        embed = embeds.get_embed(url)
+    except (EmbedException, OSError):
+        # same as Wagtail: a failed embed renders as nothing rather than crashing the page
+        cache.set(key, '', EMBED_FAILURE_TIMEOUT)
+        return ''
+    html = render_to_string('a_blog/embed_facade.html', {
+        'embed': embed,
+        'embed_html': FIND_IFRAME.sub('<iframe loading="lazy"', embed.html),
+    })
+    cache.set(key, html, EMBED_CACHE_TIMEOUT)
+    return html
+
+
+def resolve_embeds(html):
+    for url in set(embed_urls(html)):
+        render_embed(url, retry_failed=True)
+
+
+class LazyMediaEmbedHandler(MediaEmbedHandler):
+    @staticmethod
+    def expand_db_attributes(attrs):
+        return render_embed(attrs['url'])
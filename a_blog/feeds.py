@@ -0,0 +1,164 @@
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from wagtail.models import Page, Site
+
+from .models import ArticlePage, BlogPage
+from .page_urls import full_url, get_site_root_paths, serve_prefix
+
+SITEMAP_CHUNK_SIZE = 50000
+FEED_SIZE = 20
+
+SITEMAP_INDEX_KEY = 'blog:sitemap:index'
+SITEMAP_CHUNK_KEY = 'blog:sitemap:%d'
+FEED_KEY = 'blog:feed:%s'
+
+
+def cached_stream(key, generator):
+    """
+    Yield the cached document for key, or stream it from generator and
+    store the joined output once the last chunk has been produced.
+    """
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    for part in generator:
+        parts.append(part)
+        yield part
+    cache.set(key, ''.join(parts), None)
+
+
+def site_url():
+    """
+    The default site's root URL. These documents are cached for every
+    client, so their links never come from the request's Host header.
+    """
+    site = Site.objects.filter(is_default_site=True).first()
+    return site.root_url + '/' if site else '/'
+
+
+def sitemap_pages():
+    return Page.objects.live().public().type(BlogPage, ArticlePage)
+
+
+def sitemap_chunk_ids():
+    # chunks are pk ranges, so publishing one page only invalidates its own chunk
+    last = sitemap_pages().order_by('-pk').values_list('pk', flat=True).first()
+    if last is None:
+        return []
+    return range(last // SITEMAP_CHUNK_SIZE + 1)
+
+
+def sitemap_index(request):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    root_url = site_url().rstrip('/')
+    for chunk in sitemap_chunk_ids():
+        url = root_url + reverse('blog_sitemap_chunk', args=(chunk,))
+        yield '<sitemap><loc>%s</loc></sitemap>\n' % escape(url)
+    yield '</sitemapindex>\n'
+
+
+def sitemap_chunk(request, chunk):
+    root_paths = get_site_root_paths(request)
+    prefix = serve_prefix()
+    pages = (
+        sitemap_pages()
+        .filter(pk__gte=chunk * SITEMAP_CHUNK_SIZE, pk__lt=(chunk + 1) * SITEMAP_CHUNK_SIZE)
+        .order_by('pk')
+        .values_list('url_path', 'last_published_at')
+    )
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for url_path, last_published_at in pages.iterator(chunk_size=2000):
+        url = full_url(url_path, root_paths, prefix)
+        if url is None:
+            continue
+        lastmod = ''
+        if last_published_at:
+            lastmod = '<lastmod>%s</lastmod>' % last_published_at.date().isoformat()
+        yield '<url><loc>%s</loc>%s</url>\n' % (escape(url), lastmod)
+    yield '</urlset>\n'
+
+
+def feed_articles():
+    return (
+        ArticlePage.objects.live().public()
+        .select_related('owner__profile')
+        .only('title', 'intro', 'url_path', 'first_published_at', 'last_published_at',
+              'owner__username', 'owner__profile__displayname')
+        .order_by('-first_published_at')[:FEED_SIZE]
+    )
+
+
+def author_name(article):
+    if article.owner is None:
+        return ''
+    return article.owner.profile.name
+
+
+def rss_feed(request):
+    root_paths = get_site_root_paths(request)
+    prefix = serve_prefix()
+    home_url = site_url()
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/"><channel>\n'
+    yield '<title>%s</title><link>%s</link><description>%s</description>\n' % (
+        escape(settings.WAGTAIL_SITE_NAME), escape(home_url), escape(settings.WAGTAIL_SITE_NAME))
+    for article in feed_articles():
+        url = escape(full_url(article.url_path, root_paths, prefix) or home_url)
+        yield (
+            '<item><title>%s</title><link>%s</link><guid>%s</guid>'
+            '<description>%s</description><dc:creator>%s</dc:creator><pubDate>%s</pubDate></item>\n'
+        ) % (
+            escape(article.title), url, url, escape(article.intro),
+            escape(author_name(article)), rfc2822_date(article.first_published_at),
+        )
+    yield '</channel></rss>\n'
+
+
+def atom_feed(request):
+    root_paths = get_site_root_paths(request)
+    prefix = serve_prefix()
+    home_url = site_url()
+    articles = list(feed_articles())
+    updated = max((article.last_published_at for article in articles), default=None)
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield '<title>%s</title><id>%s</id><link href="%s"/>\n' % (
+        escape(settings.WAGTAIL_SITE_NAME), escape(home_url), escape(home_url))
+    if updated:
+        yield '<updated>%s</updated>\n' % rfc3339_date(updated)
+    for article in articles:
+        url = escape(full_url(article.url_path, root_paths, prefix) or home_url)
+        yield (
+            '<entry><title>%s</title><link href="%s"/><id>%s</id><summary>%s</summary>'
+            '<author><name>%s</name></author><published>%s</published><updated>%s</updated></entry>\n'
+        ) % (
+            escape(article.title), url, url, escape(article.intro), escape(author_name(article)),
+            rfc3339_date(article.first_published_at), rfc3339_date(article.last_published_at),
+        )
+    yield '</feed>\n'
+
+
+def invalidate(page):
+    if page.pk is not None:
+        cache.delete(SITEMAP_CHUNK_KEY % (page.pk // SITEMAP_CHUNK_SIZE))
+    cache.delete(SITEMAP_INDEX_KEY)
+    invalidate_feeds()
+
+
+def invalidate_feeds():
+    # the feeds name each article's author
+    cache.delete_many([FEED_KEY % 'rss', FEED_KEY % 'atom'])
+
+
+def invalidate_all():
+    # moves and slug changes rewrite the url_path of every descendant
+    keys = [SITEMAP_CHUNK_KEY % chunk for chunk in sitemap_chunk_ids()]
+    cache.delete_many(keys + [SITEMAP_INDEX_KEY, FEED_KEY % 'rss', FEED_KEY % 'atom'])
@@ -0,0 +1,155 @@
+import html
+import re
+
+from django.db.models import Value
+from django.db.models.functions import Greatest, Lower, StrIndex, Substr
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from wagtail.models import Page
+
+from .models import ArticleListing, ArticleListingTag, ArticlePage, ArticleTag
+
+LISTING_FIELDS = [
+    'parent', 'url_path', 'title', 'intro', 'date', 'first_published_at', 'image_url',
+    'author_name', 'author_username', 'views', 'body_text',
+]
+
+EXCERPT_LENGTH = 200
+EXCERPT_LEAD = 60
+
+FIND_TAG = re.compile(r'<[^>]*>')
+FIND_SPACE = re.compile(r'\s+')
+
+
+def plain_text(rich_text):
+    return FIND_SPACE.sub(' ', html.unescape(FIND_TAG.sub(' ', rich_text or ''))).strip()
+
+
+def card_image_url(image):
+    return image.get_rendition(ArticlePage.card_rendition).url if image else ''
+
+
+def build_listing(article, parent_id, image_url):
+    owner = article.owner
+    return ArticleListing(
+        page_id=article.pk,
+        parent_id=parent_id,
+        url_path=article.url_path,
+        title=article.title,
+        intro=article.intro,
+        date=article.date,
+        first_published_at=article.first_published_at,
+        image_url=image_url,
+        author_name=owner.profile.name if owner else '',
+        author_username=owner.username if owner else '',
+        views=article.views,
+        body_text=plain_text(article.body),
+    )
+
+
+def write_listing_tags(tag_ids):
+    """Replace the tag rows of listings, given {page_id: (first_published_at, [tag_id, ...])}."""
+    ArticleListingTag.objects.filter(listing__in=list(tag_ids)).delete()
+    ArticleListingTag.objects.bulk_create([
+        ArticleListingTag(listing_id=page_id, tag_id=tag_id, first_published_at=first_published_at)
+        for page_id, (first_published_at, tags) in tag_ids.items()
+        for tag_id in set(tags)
+    ])
+
+
+def update_listing(article):
+    """Write the listing row for a just-published article."""
+    listing = build_listing(article, article.get_parent().pk, card_image_url(article.image))
+    listing.save()
+    write_listing_tags({article.pk: (article.first_published_at, [tag.pk for tag in article.tags.all()])})
+
+
+def remove_listing(page_id):
+    ArticleListing.objects.filter(page_id=page_id).delete()
+
+
+def rebuild_listings(articles, batch_size=500):
+    """
+    Upsert listing rows for a queryset of articles in batches, for backfills
+    and for changes that bypass publishing (bulk imports, moves, author
+    renames). Returns the number of rows written.
+    """
+    articles = (
+        articles.live().select_related('owner__profile', 'image')
+        .order_by('pk').iterator(chunk_size=batch_size)
+    )
+    count = 0
+    batch = []
+    for article in articles:
+        batch.append(article)
+        if len(batch) == batch_size:
+            count += _write_batch(batch)
+            batch = []
+    if batch:
+        count += _write_batch(batch)
+    return count
+
+
+def _write_batch(articles):
+    parent_ids = dict(
+        Page.objects.filter(path__in={article.path[:-Page.steplen] for article in articles})
+        .values_list('path', 'pk')
+    )
+    tag_ids = {article.pk: (article.first_published_at, []) for article in articles}
+    for page_id, tag_id in ArticleTag.objects.filter(
+        content_object_id__in=list(tag_ids)
+    ).values_list('content_object_id', 'tag_id'):
+        tag_ids[page_id][1].append(tag_id)
+    # imports tend to reuse a handful of images across many articles
+    images = {article.image_id: article.image for article in articles}
+    image_urls = {image_id: card_image_url(image) for image_id, image in images.items()}
+
+    ArticleListing.objects.bulk_create(
+        [
+            build_listing(article, parent_ids[article.path[:-Page.steplen]], image_urls[article.image_id])
+            for article in articles
+        ],
+        update_conflicts=True,
+        unique_fields=['page'],
+        update_fields=LISTING_FIELDS,
+    )
+    write_listing_tags(tag_ids)
+    return len(articles)
+
+
+def with_excerpts(listings, query):
+    """
+    Annotate listings with the window of body_text around the longest
+    query term, cut by the database so the full body never leaves it.
+    """
+    terms = query.split()
+    if not terms:
+        return listings
+    term = max(terms, key=len).lower()
+    position = StrIndex(Lower('body_text'), Value(term))
+    return listings.annotate(
+        excerpt_start=Greatest(position - EXCERPT_LEAD, 1),
+        excerpt=Substr('body_text', Greatest(position - EXCERPT_LEAD, 1), EXCERPT_LENGTH + 1),
+    )
+
+
+def highlight(listing, query):
+    """Escaped excerpt HTML with every query term wrapped in <mark>."""
+    excerpt = listing.excerpt
+    if not excerpt:
+        return ''
+    truncated = len(excerpt) > EXCERPT_LENGTH
+    excerpt = excerpt[:EXCERPT_LENGTH]
+    # don't start or end on half a word
+    if listing.excerpt_start > 1:
+        excerpt = excerpt.partition(' ')[2]
+    if truncated:
+        excerpt = excerpt.rpartition(' ')[0]
+    terms = sorted({re.escape(term) for term in query.split()}, key=len, reverse=True)
+    parts = re.split(f"({'|'.join(terms)})", excerpt, flags=re.IGNORECASE)
+    marked = ''.join(
+        f'<mark>{escape(part)}</mark>' if index % 2 else escape(part) for index, part in enumerate(parts)
+    )
+    prefix = '&hellip;' if listing.excerpt_start > 1 else ''
+    suffix = '&hellip;' if truncated else ''
+    return mark_safe(prefix + marked + suffix)
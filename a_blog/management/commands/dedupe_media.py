@@ -0,0 +1,66 @@
+import re
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from a_blog.listings import rebuild_listings
+from a_blog.models import ArticlePage
+from a_core.storage import REFERENCES, ContentAddressedStorage, content_hash, hashed_name, is_hashed
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+class Command(BaseCommand):
+    help = (
+        "Move existing media files to content-addressed names, point every row at the shared copy "
+        "and delete the duplicates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be merged without changing anything')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        replaced = {}
+        targets = {}
+        for label, field_name in REFERENCES:
+            model = apps.get_model(label)
+            storage = model._meta.get_field(field_name).storage
+            if not isinstance(storage, ContentAddressedStorage):
+                self.stderr.write(f'Skipping {label}.{field_name}: not stored in ContentAddressedStorage')
+                continue
+            rows = model._default_manager.exclude(**{field_name: ''}).values_list('pk', field_name)
+            for pk, name in list(rows):
+                # documents keep their names; saving them again would only rename them
+                if not is_hashed(name) or HASHED_NAME.search(name):
+                    continue
+                if not storage.exists(name):
+                    self.stderr.write(f'Missing file for {label} {pk}: {name}')
+                    continue
+                with storage.open(name) as content:
+                    if dry_run:
+                        new_name = hashed_name(name, content_hash(content))
+                    else:
+                        new_name = storage.save(name, content)
+                if not dry_run:
+                    # update() rather than save() so django_cleanup doesn't delete the old file early
+                    model._default_manager.filter(pk=pk).update(**{field_name: new_name})
+                targets.setdefault(new_name, set()).add(name)
+                replaced[(storage, name)] = True
+
+        freed = 0
+        for storage, name in replaced:
+            freed += storage.size(name)
+            if not dry_run:
+                storage.delete(name)
+
+        if replaced and not dry_run:
+            # listing rows carry card rendition URLs
+            rebuild_listings(ArticlePage.objects.all())
+
+        duplicates = sum(len(names) - 1 for names in targets.values())
+        verb = 'Would move' if dry_run else 'Moved'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {len(replaced)} files to {len(targets)} content-addressed files '
+            f'({duplicates} duplicates, {freed / 1024 / 1024:.1f} MB in old copies)'
+        ))
@@ -0,0 +1,68 @@
+import csv
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from a_blog.models import ArticlePage, ArticleTag, BlogPage
+from .import_articles import FIELDS, batched
+
+
+class Command(BaseCommand):
+    help = "Stream the articles under a BlogPage to JSONL or CSV in the format import_articles reads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('parent', type=int, help='ID of the BlogPage to export')
+        parser.add_argument('file', nargs='?', default='-', help="Output file, or '-' for stdout")
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            parent = BlogPage.objects.get(pk=options['parent'])
+        except BlogPage.DoesNotExist:
+            raise CommandError(f"BlogPage {options['parent']} does not exist")
+
+        fmt = options['format'] or ('csv' if options['file'].endswith('.csv') else 'jsonl')
+        stream = sys.stdout if options['file'] == '-' else open(options['file'], 'w', newline='', encoding='utf-8')
+        try:
+            if fmt == 'csv':
+                writer = csv.DictWriter(stream, fieldnames=FIELDS)
+                writer.writeheader()
+                write = writer.writerow
+            else:
+                write = lambda row: stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+            articles = (
+                ArticlePage.objects.child_of(parent).order_by('path')
+                .values_list('pk', 'title', 'slug', 'intro', 'body', 'date', 'caption', 'image_id',
+                             'owner__username', 'first_published_at', 'live')
+                .iterator(chunk_size=options['batch_size'])
+            )
+            count = 0
+            for batch in batched(articles, options['batch_size']):
+                tags = {}
+                for page_id, name in ArticleTag.objects.filter(
+                    content_object_id__in=[article[0] for article in batch]
+                ).values_list('content_object_id', 'tag__name'):
+                    tags.setdefault(page_id, []).append(name)
+                for pk, title, slug, intro, body, date, caption, image, owner, published_at, live in batch:
+                    article_tags = tags.get(pk, [])
+                    write({
+                        'title': title,
+                        'slug': slug,
+                        'intro': intro,
+                        'body': body,
+                        'date': date.isoformat(),
+                        'caption': caption,
+                        'image': image,
+                        'tags': ','.join(article_tags) if fmt == 'csv' else article_tags,
+                        'owner': owner,
+                        'first_published_at': published_at.isoformat() if published_at else None,
+                        'live': live,
+                    })
+                count += len(batch)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        self.stderr.write(f'Exported {count} articles')
@@ -0,0 +1,93 @@
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from taggit.models import Tag
+from wagtail.models import Page
+
+from a_blog.models import ArticlePage, ArticleTag, BlogPage
+from a_blog.static_export import MANIFEST_NAME, export_page
+
+
+def signature(page):
+    return f'{page.live_revision_id}:{page.last_published_at.isoformat() if page.last_published_at else ""}'
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the live blog tree and its tag listings to static HTML. Only pages whose revision "
+        "changed since the last export are rendered again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=getattr(settings, 'BLOG_STATIC_EXPORT_ROOT', None))
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: CPU count)')
+        parser.add_argument('--full', action='store_true', help='Ignore the manifest and render everything')
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            raise CommandError('Pass --output or set BLOG_STATIC_EXPORT_ROOT')
+        root = Path(options['output'])
+        root.mkdir(parents=True, exist_ok=True)
+        manifest_path = root / MANIFEST_NAME
+        previous = {}
+        if manifest_path.exists() and not options['full']:
+            previous = json.loads(manifest_path.read_text())
+
+        pages = (
+            Page.objects.live().public().type(BlogPage, ArticlePage)
+            .only('pk', 'path', 'depth', 'live_revision_id', 'last_published_at', 'content_type')
+        )
+        current = {}
+        children = {}
+        for page in pages.order_by('path').iterator(chunk_size=2000):
+            current[str(page.pk)] = signature(page)
+            parent_path = page.path[:-Page.steplen]
+            children.setdefault(parent_path, []).append(current[str(page.pk)])
+
+        # a listing has to be rendered again whenever any of its articles changed
+        jobs = {}
+        for blog in BlogPage.objects.live().public().only('pk', 'path', 'live_revision_id', 'last_published_at'):
+            listing_signature = current[str(blog.pk)] + '|' + ','.join(children.get(blog.path, []))
+            current[str(blog.pk)] = listing_signature
+            tags = (
+                Tag.objects.filter(
+                    pk__in=ArticleTag.objects.filter(content_object__path__startswith=blog.path).values('tag_id')
+                ).values_list('name', flat=True)
+            )
+            for tag in tags:
+                current[f'{blog.pk}?tag={tag}'] = listing_signature
+
+        for key, sig in current.items():
+            if previous.get(key, {}).get('signature') != sig:
+                page_id, _, tag = key.partition('?tag=')
+                jobs[key] = (int(page_id), tag or None)
+
+        started = time.monotonic()
+        manifest = {key: value for key, value in previous.items() if key in current}
+        if jobs:
+            # spawned workers open their own database connections instead of sharing ours
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(options['workers'], mp_context=context, initializer=django.setup) as pool:
+                futures = {key: pool.submit(export_page, str(root), *job) for key, job in jobs.items()}
+                for done, (key, future) in enumerate(futures.items(), 1):
+                    manifest[key] = {'signature': current[key], 'file': future.result()}
+                    if done % 100 == 0:
+                        self.stdout.write(f'{done}/{len(jobs)} pages')
+
+        removed = 0
+        for key, entry in previous.items():
+            if key not in current:
+                (root / entry['file']).unlink(missing_ok=True)
+                removed += 1
+
+        manifest_path.write_text(json.dumps(manifest))
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {len(jobs)} of {len(current)} pages, removed {removed}, '
+            f'in {time.monotonic() - started:.1f}s'
+        ))
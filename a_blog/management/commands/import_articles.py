@@ -0,0 +1,304 @@
+import csv
+import json
+import sys
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.text import slugify
+from taggit.models import Tag
+from wagtail.images.models import Image
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backends
+
+from a_blog import feeds
+from a_blog.listings import rebuild_listings
+from a_blog.models import ArticlePage, ArticleTag, BlogPage
+
+FIELDS = ['title', 'slug', 'intro', 'body', 'date', 'caption', 'image', 'tags', 'owner', 'first_published_at', 'live']
+
+TITLE_LENGTH = Page._meta.get_field('title').max_length
+SLUG_LENGTH = Page._meta.get_field('slug').max_length
+INTRO_LENGTH = ArticlePage._meta.get_field('intro').max_length
+CAPTION_LENGTH = ArticlePage._meta.get_field('caption').max_length
+
+
+def read_rows(stream, fmt):
+    if fmt == 'csv':
+        rows = csv.DictReader(stream)
+    else:
+        rows = (json.loads(line) for line in stream if line.strip())
+    for row in rows:
+        tags = row.get('tags') or []
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        row['tags'] = [tag.strip() for tag in tags if tag.strip()]
+        yield row
+
+
+def parse_live(value):
+    if value is None or value == '':
+        return True
+    if isinstance(value, bool):
+        return value
+    return {'true': True, '1': True, 'false': False, '0': False}.get(str(value).strip().lower())
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Import articles from JSONL or CSV under a BlogPage. Tree paths are precomputed and rows are "
+        "written in batched transactions; search indexing and renditions run after the import."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('parent', type=int, help='ID of the BlogPage to import under')
+        parser.add_argument('file', help="Input file, or '-' for stdin")
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='Defaults to the file extension')
+        parser.add_argument('--owner', help='Username used for rows without an owner')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--skip-index', action='store_true', help='Leave indexing to update_index')
+        parser.add_argument('--renditions', action='store_true', help='Pre-generate article image renditions')
+
+    def handle(self, *args, **options):
+        try:
+            self.parent = BlogPage.objects.get(pk=options['parent'])
+        except BlogPage.DoesNotExist:
+            raise CommandError(f"BlogPage {options['parent']} does not exist")
+
+        fmt = options['format'] or ('csv' if options['file'].endswith('.csv') else 'jsonl')
+        self.default_owner = None
+        if options['owner']:
+            try:
+                self.default_owner = User.objects.get(username=options['owner'].lower())
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['owner']} does not exist")
+        self.owners = {}
+        self.content_type = ContentType.objects.get_for_model(ArticlePage)
+        self.slugs = set(self.parent.get_children().values_list('slug', flat=True))
+        last_child = self.parent.get_last_child()
+        self.next_step = Page._str2int(last_child.path[-Page.steplen:]) + 1 if last_child else 1
+
+        stream = sys.stdin if options['file'] == '-' else open(options['file'], newline='', encoding='utf-8')
+        imported = []
+        self.row_number = 0
+        self.rejected = 0
+        started = time.monotonic()
+        try:
+            for batch in batched(read_rows(stream, fmt), options['batch_size']):
+                batch = self.validate_batch(batch)
+                if batch:
+                    imported.extend(self.import_batch(batch))
+                elapsed = time.monotonic() - started
+                self.stdout.write(f'{len(imported)} rows ({len(imported) / elapsed:.0f} rows/sec)')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        # signals were bypassed, so run the publish side effects once for the whole import
+        feeds.invalidate_all()
+        rebuild_listings(ArticlePage.objects.filter(pk__in=imported), options['batch_size'])
+        if not options['skip_index']:
+            self.update_index(imported, options['batch_size'])
+        if options['renditions']:
+            self.generate_renditions(imported, options['batch_size'])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {len(imported)} articles in {elapsed:.1f}s ({len(imported) / max(elapsed, 0.001):.0f} rows/sec)'
+        ))
+        if self.rejected:
+            raise CommandError(f'{self.rejected} invalid rows were skipped')
+
+    def get_owner(self, username):
+        if not username:
+            return self.default_owner
+        if username not in self.owners:
+            self.owners[username] = User.objects.filter(username=username.lower()).first()
+        return self.owners[username]
+
+    def validate_batch(self, rows):
+        """
+        Check every row against the model constraints the bulk insert
+        bypasses, and parse its values in place. Invalid rows are reported
+        and dropped, so a batch is only written once all of it is valid.
+        """
+        image_ids = set()
+        for row in rows:
+            try:
+                row['image'] = int(row.get('image') or 0)
+            except (TypeError, ValueError):
+                row['image'] = 0
+            image_ids.add(row['image'])
+        image_ids = set(Image.objects.filter(pk__in=image_ids).values_list('pk', flat=True))
+
+        valid = []
+        for row in rows:
+            self.row_number += 1
+            errors = self.row_errors(row, image_ids)
+            if errors:
+                self.rejected += 1
+                self.stderr.write(f"Row {self.row_number}: {'; '.join(errors)}")
+            else:
+                valid.append(row)
+        return valid
+
+    def row_errors(self, row, image_ids):
+        errors = []
+        title = (row.get('title') or '').strip()
+        if not title:
+            errors.append('missing title')
+        elif len(title) > TITLE_LENGTH:
+            errors.append(f'title is longer than {TITLE_LENGTH} characters')
+        if len(row.get('slug') or '') > SLUG_LENGTH:
+            errors.append(f'slug is longer than {SLUG_LENGTH} characters')
+        if not row.get('intro'):
+            errors.append('missing intro')
+        elif len(row['intro']) > INTRO_LENGTH:
+            errors.append(f'intro is longer than {INTRO_LENGTH} characters')
+        if len(row.get('caption') or '') > CAPTION_LENGTH:
+            errors.append(f'caption is longer than {CAPTION_LENGTH} characters')
+        if row['image'] not in image_ids:
+            errors.append(f"unknown image {row['image']}" if row['image'] else 'missing image')
+
+        username = row.get('owner')
+        row['owner'] = self.get_owner(username)
+        if row['owner'] is None:
+            errors.append(f'unknown owner {username}' if username else 'missing owner (pass --owner)')
+
+        # rows without a live column are published, as before it existed
+        live = row.get('live')
+        row['live'] = parse_live(live)
+        if row['live'] is None:
+            errors.append(f'invalid live {live!r}')
+
+        for field, parse in (('date', parse_date), ('first_published_at', parse_datetime)):
+            value = row.get(field) or None
+            try:
+                row[field] = parse(value) if value else None
+            except ValueError:
+                row[field] = None
+            if value and row[field] is None:
+                errors.append(f'invalid {field} {value!r}')
+        return errors
+
+    def unique_slug(self, row):
+        # leave room for a -<n> suffix
+        base = slugify(row.get('slug') or row['title'], allow_unicode=True)[:SLUG_LENGTH - 8] or 'article'
+        slug, suffix = base, 1
+        while slug in self.slugs:
+            suffix += 1
+            slug = f'{base}-{suffix}'
+        self.slugs.add(slug)
+        return slug
+
+    @transaction.atomic
+    def import_batch(self, rows):
+        now = timezone.now()
+        depth = self.parent.depth + 1
+        pages = []
+        for row in rows:
+            slug = self.unique_slug(row)
+            live = row['live']
+            # drafts keep whatever publish date they had, which is none if never published
+            published_at = row['first_published_at'] or (now if live else None)
+            owner = row['owner']
+            pages.append(Page(
+                path=Page._get_path(self.parent.path, depth, self.next_step),
+                depth=depth,
+                numchild=0,
+                title=row['title'],
+                draft_title=row['title'],
+                slug=slug,
+                url_path=f'{self.parent.url_path}{slug}/',
+                content_type=self.content_type,
+                locale_id=self.parent.locale_id,
+                translation_key=uuid.uuid4(),
+                owner=owner,
+                live=live,
+                has_unpublished_changes=not live,
+                first_published_at=published_at,
+                last_published_at=published_at,
+            ))
+            self.next_step += 1
+        Page.objects.bulk_create(pages)
+
+        # Django refuses bulk_create on multi-table children, so write the
+        # ArticlePage rows against the parent pks ourselves
+        articles = []
+        for page, row in zip(pages, rows):
+            articles.append(ArticlePage(
+                page_ptr_id=page.pk,
+                intro=row['intro'],
+                body=row.get('body') or '',
+                date=row['date'] or (page.first_published_at or now).date(),
+                caption=row.get('caption') or '',
+                image_id=row['image'],
+            ))
+        ArticlePage._base_manager._insert(
+            articles, fields=ArticlePage._meta.local_concrete_fields, using=connection.alias
+        )
+        Page.objects.filter(pk=self.parent.pk).update(numchild=F('numchild') + len(pages))
+
+        tag_names = {name for row in rows for name in row['tags']}
+        tags = self.get_tags(tag_names)
+        ArticleTag.objects.bulk_create([
+            ArticleTag(content_object_id=page.pk, tag_id=tags[name])
+            for page, row in zip(pages, rows)
+            for name in set(row['tags'])
+        ])
+        return [page.pk for page in pages]
+
+    def get_tags(self, names):
+        tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+        missing = names - tags.keys()
+        if missing:
+            Tag.objects.bulk_create(
+                [Tag(name=name, slug=slugify(name, allow_unicode=True)) for name in missing],
+                ignore_conflicts=True,
+            )
+            tags.update(Tag.objects.filter(name__in=missing).values_list('name', 'pk'))
+            for name in missing - tags.keys():
+                # slug clashed with an existing tag; let taggit pick a unique one
+                tags[name] = Tag.objects.create(name=name).pk
+        return tags
+
+    def update_index(self, ids, batch_size):
+        started = time.monotonic()
+        backends = list(get_search_backends())
+        for start in range(0, len(ids), batch_size):
+            articles = list(
+                ArticlePage.objects.filter(pk__in=ids[start:start + batch_size])
+                .select_related('owner__profile').prefetch_related('tags')
+            )
+            for backend in backends:
+                backend.add_bulk(ArticlePage, articles)
+        self.stdout.write(f'Indexed {len(ids)} articles in {time.monotonic() - started:.1f}s')
+
+    def generate_renditions(self, ids, batch_size):
+        started = time.monotonic()
+        image_ids = (
+            ArticlePage.objects.filter(pk__in=ids, image__isnull=False)
+            .order_by().values_list('image_id', flat=True).distinct()
+        )
+        image_ids = list(image_ids)
+        for start in range(0, len(image_ids), batch_size):
+            for image in Image.objects.filter(pk__in=image_ids[start:start + batch_size]):
+                image.get_rendition(ArticlePage.image_rendition)
+        self.stdout.write(f'Generated renditions for {len(image_ids)} images in {time.monotonic() - started:.1f}s')
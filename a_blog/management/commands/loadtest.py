@@ -0,0 +1,246 @@
+import asyncio
+import random
+import re
+import time
+import uuid
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from taggit.models import Tag
+
+from a_blog.models import ArticleListing, BlogPage
+from a_blog.page_urls import full_url, get_site_root_paths, serve_prefix
+
+ROUTES = ('blog', 'tag', 'search', 'article', 'profile')
+DEFAULT_MIX = 'blog=30,tag=15,search=10,article=40,profile=5'
+# a client backs off after each failed request and gives up after this many in a row
+MAX_CONNECTION_FAILURES = 5
+BACKOFF = 0.05
+SEARCH_TERMS = ['django', 'wagtail', 'python', 'performance', 'cache', 'blog']
+
+# access log request line, e.g. "GET /blog/search/?query=x HTTP/1.1"
+LOG_REQUEST = re.compile(r'"(GET|HEAD) (\S+) HTTP/[\d.]+"')
+
+
+def route_for(path):
+    path, _, query = path.partition('?')
+    if path.startswith('/@'):
+        return 'profile'
+    if path.startswith('/blog/search/'):
+        return 'search'
+    if 'tag=' in query:
+        return 'tag'
+    if path.startswith('/blog/'):
+        return 'article' if path.rstrip('/').count('/') > 2 else 'blog'
+    return 'other'
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client on asyncio streams."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def get(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n'
+            f'User-Agent: blog-loadtest\r\nAccept-Encoding: identity\r\n\r\n'.encode()
+        )
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed by server')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        size = 0
+        if 'content-length' in headers:
+            size = int(headers['content-length'])
+            await self.reader.readexactly(size)
+        elif headers.get('transfer-encoding') == 'chunked':
+            while True:
+                chunk_size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(chunk_size + 2)
+                size += chunk_size
+                if chunk_size == 0:
+                    break
+        else:
+            size = len(await self.reader.read())
+            await self.close()
+        if headers.get('connection', '').lower() == 'close' and self.writer:
+            await self.close()
+        return status, size
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server (runserver, gunicorn, uvicorn, ...) with a weighted mix of blog routes "
+        "or a replayed access log, and report throughput, latency percentiles and errors per route."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server under test')
+        parser.add_argument('--concurrency', type=int, default=20, help='Simulated clients')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run for (mix mode)')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Route weights (default: {DEFAULT_MIX})')
+        parser.add_argument('--think-time', type=float, default=0, help='Mean pause between requests per client, in seconds')
+        parser.add_argument('--cache-bust', action='store_true', help='Add a unique query parameter to every request')
+        parser.add_argument('--replay', help='Access log to replay (common/combined format) instead of the mix')
+
+    def handle(self, *args, **options):
+        base = urlsplit(options['url'])
+        if base.scheme != 'http' or not base.hostname:
+            raise CommandError(f"--url must be an http:// URL, got {options['url']!r}")
+        self.host = base.hostname
+        self.port = base.port or 80
+        self.cache_bust = options['cache_bust']
+        self.think_time = options['think_time']
+        self.results = {}
+        self.gave_up = 0
+
+        if options['replay']:
+            with open(options['replay'], encoding='utf-8', errors='replace') as log:
+                paths = [match[2] for match in map(LOG_REQUEST.search, log) if match]
+            if not paths:
+                raise CommandError(f"No GET requests found in {options['replay']}")
+            self.queue = list(reversed(paths))
+            self.deadline = None
+        else:
+            self.weights = self.parse_mix(options['mix'])
+            self.pools = self.url_pools()
+            self.queue = None
+            self.deadline = time.monotonic() + options['duration']
+
+        started = time.monotonic()
+        asyncio.run(self.run(options['concurrency']))
+        self.report(time.monotonic() - started)
+        if self.gave_up:
+            raise CommandError(
+                f"{self.gave_up} clients stopped after {MAX_CONNECTION_FAILURES} failed requests in a row "
+                f"to {options['url']}"
+            )
+
+    def parse_mix(self, mix):
+        weights = {}
+        for part in mix.split(','):
+            route, _, weight = part.partition('=')
+            route = route.strip()
+            if route not in ROUTES:
+                raise CommandError(f"Unknown route {route!r} in --mix; choose from {', '.join(ROUTES)}")
+            try:
+                weights[route] = float(weight)
+            except ValueError:
+                raise CommandError(f'Invalid weight {weight!r} for {route} in --mix')
+            if weights[route] < 0:
+                raise CommandError(f'Invalid weight {weight!r} for {route} in --mix')
+        if not any(weights.values()):
+            raise CommandError('--mix needs at least one route with a positive weight')
+        return weights
+
+    def url_pools(self):
+        blogs = [urlsplit(page.full_url).path for page in BlogPage.objects.live()]
+        if not blogs:
+            raise CommandError('No live BlogPage to test against; run seed_loadtest first')
+        listings = ArticleListing.objects.values_list('url_path', 'author_username')[:5000]
+        root_paths = get_site_root_paths()
+        prefix = serve_prefix()
+        articles = [urlsplit(full_url(url_path, root_paths, prefix)).path for url_path, _ in listings]
+        users = sorted({username for _, username in listings if username})
+        tags = list(Tag.objects.values_list('name', flat=True)[:500])
+        return {
+            'blog': blogs,
+            'tag': [f'{random.choice(blogs)}?{urlencode({"tag": tag})}' for tag in tags] or blogs,
+            'search': [f'/blog/search/?{urlencode({"query": term})}' for term in SEARCH_TERMS],
+            'article': articles or blogs,
+            'profile': [f'/@{username}/' for username in users] or blogs,
+        }
+
+    def next_path(self):
+        if self.queue is not None:
+            return self.queue.pop() if self.queue else None
+        if time.monotonic() >= self.deadline:
+            return None
+        route = random.choices(list(self.weights), weights=list(self.weights.values()))[0]
+        path = random.choice(self.pools[route])
+        if self.cache_bust:
+            path += ('&' if '?' in path else '?') + f'_cb={uuid.uuid4().hex[:12]}'
+        return path
+
+    async def run(self, concurrency):
+        await asyncio.gather(*(self.client() for _ in range(concurrency)))
+
+    async def client(self):
+        connection = Connection(self.host, self.port)
+        failures = 0
+        while (path := self.next_path()) is not None:
+            route = route_for(path)
+            stats = self.results.setdefault(route, {'latencies': [], 'errors': 0, 'failed': 0, 'bytes': 0})
+            started = time.monotonic()
+            try:
+                status, size = await connection.get(path)
+            except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError):
+                stats['errors'] += 1
+                stats['failed'] += 1
+                await connection.close()
+                failures += 1
+                if failures >= MAX_CONNECTION_FAILURES:
+                    self.gave_up += 1
+                    break
+                await asyncio.sleep(BACKOFF * 2 ** failures)
+                continue
+            failures = 0
+            stats['latencies'].append(time.monotonic() - started)
+            stats['bytes'] += size
+            if status >= 400:
+                stats['errors'] += 1
+            if self.think_time:
+                await asyncio.sleep(random.expovariate(1 / self.think_time))
+        await connection.close()
+
+    def report(self, elapsed):
+        self.stdout.write(
+            f"{'route':<10}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>9}"
+        )
+        total = errors = 0
+        for route, stats in sorted(self.results.items()):
+            latencies = stats['latencies']
+            requests = len(latencies) + stats['failed']
+            total += requests
+            errors += stats['errors']
+            self.stdout.write(
+                f'{route:<10}{requests:>10}{requests / elapsed:>9.1f}'
+                f'{percentile(latencies, 0.5) * 1000:>9.1f}{percentile(latencies, 0.9) * 1000:>9.1f}'
+                f'{percentile(latencies, 0.99) * 1000:>9.1f}{max(latencies, default=0) * 1000:>9.1f}'
+                f"{stats['errors']:>9}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), '
+            f'{errors} errors ({errors / max(total, 1):.1%})'
+        ))
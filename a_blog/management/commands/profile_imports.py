@@ -0,0 +1,68 @@
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+BOOT_SCRIPT = """
+import importlib
+import django
+django.setup()
+from django.conf import settings
+importlib.import_module(settings.WSGI_APPLICATION.rpartition('.')[0])
+importlib.import_module(settings.ROOT_URLCONF)
+"""
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$')
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot a fresh interpreter the way a WSGI worker does (settings, apps, middleware, URLconf) "
+        "under -X importtime and report where the import time goes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--settings-module', default=os.environ.get('DJANGO_SETTINGS_MODULE'),
+                            help='Settings to boot with, e.g. a_core.settings_public')
+        parser.add_argument('--limit', type=int, default=25, help='Rows per table')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=options['settings_module'])
+        started = time.monotonic()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+            env=env, capture_output=True, text=True,
+        )
+        wall = time.monotonic() - started
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+
+        modules = []
+        packages = {}
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if not match:
+                continue
+            self_us, cumulative_us, name = int(match[1]), int(match[2]), match[3]
+            modules.append((cumulative_us, self_us, name))
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + self_us
+        peak_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+        total_ms = sum(self_us for _, self_us, _ in modules) / 1000
+        self.stdout.write(
+            f"{options['settings_module']}: {len(modules)} modules, {total_ms:.0f} ms importing, "
+            f"{wall * 1000:.0f} ms wall, {peak_rss:.0f} MB peak RSS"
+        )
+
+        self.stdout.write("\nSlowest imports (cumulative ms, self ms, module):")
+        for cumulative_us, self_us, name in sorted(modules, reverse=True)[:options['limit']]:
+            self.stdout.write(f'{cumulative_us / 1000:10.1f} {self_us / 1000:8.1f}  {name}')
+
+        self.stdout.write("\nSelf time by top-level package (ms):")
+        for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:options['limit']]:
+            self.stdout.write(f'{self_us / 1000:10.1f}  {package}')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from a_blog.listings import rebuild_listings
+from a_blog.models import ArticleListing, ArticlePage
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalised ArticleListing rows from the live articles."
+
+    def handle(self, *args, **options):
+        removed, _ = ArticleListing.objects.exclude(page__live=True).delete()
+        count = rebuild_listings(ArticlePage.objects.all())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} listings, removed {removed} stale rows'))
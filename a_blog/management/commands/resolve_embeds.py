@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from a_blog.embeds import embed_urls, render_embed
+from a_blog.models import ArticlePage
+
+
+class Command(BaseCommand):
+    help = "Resolve and cache the embeds of every live article, e.g. after a deploy or a cache flush."
+
+    def handle(self, *args, **options):
+        urls = set()
+        for body in ArticlePage.objects.live().values_list('body', flat=True).iterator(chunk_size=500):
+            urls.update(embed_urls(body))
+        failed = 0
+        for url in urls:
+            if not render_embed(url):
+                failed += 1
+                self.stderr.write(f'Could not resolve {url}')
+        self.stdout.write(self.style.SUCCESS(f'Resolved {len(urls) - failed} of {len(urls)} embeds'))
@@ -0,0 +1,76 @@
+import json
+import random
+import tempfile
+
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.core.files import File
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.images.models import Image
+from wagtail.models import Site
+
+from a_blog.models import BlogPage
+
+WORDS = (
+    'django wagtail python performance cache database query index template page article tag search '
+    'server worker latency throughput request response session image rendition feed sitemap'
+).split()
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a fixture blog for the loadtest command: users, tags, and articles bulk-imported "
+        "under a BlogPage at the site root."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--tags', type=int, default=30)
+        parser.add_argument('--slug', default='loadtest', help='Slug of the BlogPage to seed under')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable fixtures')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        site = Site.objects.filter(is_default_site=True).select_related('root_page').first()
+        if site is None:
+            raise CommandError('No default Site to seed under')
+
+        blog = BlogPage.objects.filter(slug=options['slug']).first()
+        if blog is None:
+            blog = site.root_page.add_child(instance=BlogPage(title='Load test', slug=options['slug']))
+            blog.save_revision().publish()
+
+        usernames = [f"loadtest{number}" for number in range(options['users'])]
+        for username in usernames:
+            user, created = User.objects.get_or_create(username=username, defaults={'email': f'{username}@example.com'})
+            if created:
+                user.profile.displayname = username.title()
+                user.profile.save()
+
+        image = Image.objects.filter(title='Load test').first()
+        if image is None:
+            with open(finders.find('images/ape1.jpg'), 'rb') as source:
+                image = Image.objects.create(title='Load test', file=File(source, name='loadtest.jpg'))
+
+        tags = [f'{rng.choice(WORDS)}-{number}' for number in range(options['tags'])]
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', encoding='utf-8') as rows:
+            for number in range(options['articles']):
+                body = ''.join(f'<p>{sentence(rng, 60)}</p>' for _ in range(rng.randint(3, 12)))
+                rows.write(json.dumps({
+                    'title': f'{sentence(rng, 5)[:-1]} {number}',
+                    'intro': sentence(rng, 8)[:80],
+                    'body': body,
+                    'image': image.pk,
+                    'tags': rng.sample(tags, min(len(tags), rng.randint(1, 4))),
+                    'owner': rng.choice(usernames) if usernames else None,
+                }) + '\n')
+            rows.flush()
+            call_command('import_articles', blog.pk, rows.name, stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(f'Seeded {blog.url} with {options["articles"]} articles'))
@@ -0,0 +1,136 @@
+import hashlib
+import mimetypes
+
+from django import http
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .compression import ENCODERS, compress, minify_html, negotiate
+from .redirects import find_redirect
+from .static_export import export_file_path
+
+
+class RedirectMiddleware(MiddlewareMixin):
+    """
+    Drop-in for wagtail.contrib.redirects' middleware that resolves 404s
+    against an in-memory redirect table instead of querying per request.
+    """
+
+    def process_response(self, request, response):
+        if response.status_code != 404:
+            return response
+
+        redirect = find_redirect(request)
+        if redirect is None:
+            return response
+
+        link, is_permanent = redirect
+        if is_permanent:
+            return http.HttpResponsePermanentRedirect(link)
+        return http.HttpResponseRedirect(link)
+
+
+class StaticExportMiddleware:
+    """
+    Answer anonymous GETs from the files written by export_static before
+    sessions, auth or URL resolution run. Disabled unless
+    BLOG_STATIC_EXPORT_ROOT is set.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.root = getattr(settings, 'BLOG_STATIC_EXPORT_ROOT', None)
+        if not self.root:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        response = self.serve_exported(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    def serve_exported(self, request):
+        if request.method not in ('GET', 'HEAD') or settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None
+        if set(request.GET) - {'tag'}:
+            return None
+        target = export_file_path(self.root, request.path, request.GET.get('tag'))
+        if target is None or not target.is_file():
+            return None
+        content_type = mimetypes.guess_type(target.name)[0] or 'application/octet-stream'
+        if content_type == 'text/html':
+            content_type = 'text/html; charset=utf-8'
+        response = http.FileResponse(target.open('rb'), content_type=content_type)
+        if target.suffix != '.html':
+            # asset names carry their content hash
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+
+COMPRESSIBLE_TYPES = {'application/json', 'application/javascript', 'application/xml', 'image/svg+xml'}
+COMPRESSION_MIN_LENGTH = 200
+COMPRESSION_CACHE_TIMEOUT = getattr(settings, 'BLOG_COMPRESSION_CACHE_TIMEOUT', 60 * 60)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Minify HTML and compress responses with the best of brotli, zstd and
+    gzip the client accepts. The result is cached under a hash of the
+    rendered body, so repeat hits on an unchanged page skip both steps.
+    Responses that render a CSRF token are unique per request and carry a
+    secret, so they are never cached and only ever get padded gzip.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return response
+
+        content_type = response.get('Content-Type', '').partition(';')[0].strip()
+        minify = content_type == 'text/html'
+        if not (minify or content_type.startswith('text/') or content_type in COMPRESSIBLE_TYPES):
+            return response
+
+        content = response.content
+        # get_token() sets this flag; CsrfViewMiddleware resets it to False
+        # once the cookie is out but never removes it, so presence is the signal
+        has_secret = 'CSRF_COOKIE_NEEDS_UPDATE' in request.META
+        encoding = None
+        if len(content) >= COMPRESSION_MIN_LENGTH:
+            patch_vary_headers(response, ('Accept-Encoding',))
+            encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), ['gzip'] if has_secret else ENCODERS)
+        if not minify and encoding is None:
+            return response
+
+        cache_key = None
+        if not has_secret:
+            digest = hashlib.sha256(content).hexdigest()
+            cache_key = f"blog:compressed:{encoding or 'identity'}:{digest}"
+            body = cache.get(cache_key)
+            if body is not None:
+                return self.replace_content(response, body, encoding)
+
+        body = content
+        if minify:
+            body = minify_html(body.decode(response.charset)).encode(response.charset)
+        if encoding:
+            body = compress(body, encoding, padded=has_secret)
+        if cache_key:
+            cache.set(cache_key, body, COMPRESSION_CACHE_TIMEOUT)
+        return self.replace_content(response, body, encoding)
+
+    def replace_content(self, response, body, encoding):
+        response.content = body
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(body))
+        if encoding:
+            response['Content-Encoding'] = encoding
+            # the encoded bytes differ, so a strong ETag no longer holds (RFC 9110 8.8.1)
+            etag = response.get('ETag')
+            if etag and etag.startswith('"'):
+                response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.15 on 2026-10-19 05:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("a_blog", "0001_initial"),
+        ("wagtailcore", "0094_alter_page_locale"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleListing",
+            fields=[
+                (
+                    "page",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="listing",
+                        serialize=False,
+                        to="a_blog.articlepage",
+                    ),
+                ),
+                ("url_path", models.TextField()),
+                ("title", models.CharField(max_length=255)),
+                ("intro", models.CharField(max_length=80)),
+                ("date", models.DateField()),
+                ("first_published_at", models.DateTimeField()),
+                ("image_url", models.CharField(blank=True, max_length=255)),
+                ("author_name", models.CharField(blank=True, max_length=150)),
+                ("author_username", models.CharField(blank=True, max_length=150)),
+                ("views", models.PositiveIntegerField(default=0)),
+                (
+                    "parent",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="wagtailcore.page",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["parent", "-first_published_at"],
+                        name="a_blog_listing_recent_idx",
+                    ),
+                    models.Index(
+                        fields=["parent", "-views"], name="a_blog_listing_popular_idx"
+                    ),
+                    models.Index(
+                        fields=["-first_published_at"],
+                        name="a_blog_listing_all_recent_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("a_blog", "0002_articlelisting"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="articlelisting",
+            name="body_text",
+            field=models.TextField(blank=True),
+        ),
+    ]
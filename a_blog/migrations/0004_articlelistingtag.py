@@ -0,0 +1,143 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:23
+
+import html
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+STEPLEN = 4
+BATCH_SIZE = 500
+
+
+def plain_text(rich_text):
+    text = html.unescape(re.sub(r"<[^>]*>", " ", rich_text or ""))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def backfill_listings(apps, schema_editor):
+    """
+    Fill ArticleListing and ArticleListingTag for every live article, so
+    blog listings and search don't come up empty after upgrading. Card
+    image URLs need renditions, which historical models can't make; the
+    post_migrate handler in a_blog.signals fills them in.
+    """
+    ArticlePage = apps.get_model("a_blog", "ArticlePage")
+    ArticleTag = apps.get_model("a_blog", "ArticleTag")
+    ArticleListing = apps.get_model("a_blog", "ArticleListing")
+    ArticleListingTag = apps.get_model("a_blog", "ArticleListingTag")
+    Page = apps.get_model("wagtailcore", "Page")
+    Profile = apps.get_model("a_users", "Profile")
+    display_names = dict(Profile.objects.values_list("user_id", "displayname"))
+
+    ArticleListing.objects.all().delete()
+    articles = (
+        ArticlePage.objects.filter(live=True).select_related("owner").order_by("pk")
+    )
+    ids = list(articles.values_list("pk", flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = list(articles.filter(pk__in=ids[start : start + BATCH_SIZE]))
+        parent_ids = dict(
+            Page.objects.filter(
+                path__in={article.path[:-STEPLEN] for article in batch}
+            ).values_list("path", "pk")
+        )
+        ArticleListing.objects.bulk_create(
+            [
+                ArticleListing(
+                    page_id=article.pk,
+                    parent_id=parent_ids[article.path[:-STEPLEN]],
+                    url_path=article.url_path,
+                    title=article.title,
+                    intro=article.intro,
+                    date=article.date,
+                    first_published_at=article.first_published_at,
+                    image_url="",
+                    author_name=(
+                        display_names.get(article.owner_id) or article.owner.username
+                        if article.owner
+                        else ""
+                    ),
+                    author_username=article.owner.username if article.owner else "",
+                    views=article.views,
+                    body_text=plain_text(article.body),
+                )
+                for article in batch
+            ]
+        )
+        published = {article.pk: article.first_published_at for article in batch}
+        ArticleListingTag.objects.bulk_create(
+            [
+                ArticleListingTag(
+                    listing_id=page_id,
+                    tag_id=tag_id,
+                    first_published_at=published[page_id],
+                )
+                for page_id, tag_id in ArticleTag.objects.filter(
+                    content_object_id__in=published
+                ).values_list("content_object_id", "tag_id")
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("a_blog", "0003_articlelisting_body_text"),
+        ("a_users", "0001_initial"),
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleListingTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("first_published_at", models.DateTimeField()),
+                (
+                    "listing",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tags",
+                        to="a_blog.articlelisting",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="taggit.tag",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["tag", "-first_published_at"],
+                        name="a_blog_listing_tag_recent_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("listing", "tag"), name="a_blog_listing_tag_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_listings, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,19 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from wagtail.models import Page
 from wagtail.fields import RichTextField
 from wagtail.admin.panels import FieldPanel
 from wagtail.search import index
-from taggit.models import TaggedItemBase
+from taggit.models import Tag, TaggedItemBase
 from modelcluster.fields import ParentalKey
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from datetime import date
 
+VIEW_DEDUPE_TIMEOUT = getattr(settings, 'BLOG_VIEW_DEDUPE_TIMEOUT', 60 * 60 * 24)
+
 class BlogPage(Page):
     body = RichTextField(blank=True)
     
@@ -20,9 +26,14 @@ class BlogPage(Page):
     def get_context(self, request): 
         tag = request.GET.get("tag")
         if tag:
-            articles = ArticlePage.objects.filter(tags__name=tag).live().order_by('-first_published_at')
+            tag_id = Tag.objects.filter(name=tag).values_list('pk', flat=True).first()
+            if tag_id is None:
+                articles = ArticleListing.objects.none()
+            else:
+                # ordering by the tag row's own copy of the date walks a_blog_listing_tag_recent_idx
+                articles = ArticleListing.objects.filter(tags__tag_id=tag_id).order_by('-tags__first_published_at')
         else:     
-            articles = self.get_children().live().order_by('-first_published_at')
+            articles = ArticleListing.objects.filter(parent=self).order_by('-first_published_at')
             
         context = super().get_context(request)
         context['articles'] = articles
@@ -43,19 +54,34 @@ class ArticlePage(Page):
     
     views = models.PositiveIntegerField(default=0, editable=False)
     
+    image_rendition = 'fill-1200x675|jpegquality-80'
+    card_rendition = 'fill-800x450|jpegquality-80'
+    
     def increment_view_count(self):
         self.views += 1
         self.save(update_fields=["views"])
+        ArticleListing.objects.filter(page=self).update(views=self.views)
         
     def serve(self, request):
-        session_key = f'article_viewed_{self.pk}'
-        if not request.session.get(session_key, False):
+        if self.first_view(request):
             self.increment_view_count()
-            request.session[session_key] = True
         return super().serve(request)
+
+    def first_view(self, request):
+        # anonymous readers are told apart by address and browser in the
+        # cache, so reading an article never creates a session
+        if not request.user.is_authenticated:
+            client = f"{request.META.get('REMOTE_ADDR')}|{request.META.get('HTTP_USER_AGENT', '')}"
+            key = f'blog:viewed:{self.pk}:' + hashlib.sha256(client.encode()).hexdigest()
+            return cache.add(key, True, VIEW_DEDUPE_TIMEOUT)
+        session_key = f'article_viewed_{self.pk}'
+        if request.session.get(session_key, False):
+            return False
+        request.session[session_key] = True
+        return True
     
     def image_url(self):
-        return self.image.get_rendition('fill-1200x675|jpegquality-80').url
+        return self.image.get_rendition(self.image_rendition).url
     
     def get_context(self, request):
         context = super().get_context(request)
@@ -90,3 +116,55 @@ class ArticlePage(Page):
     
 class ArticleTag(TaggedItemBase):
     content_object = ParentalKey(ArticlePage, on_delete=models.CASCADE, related_name='tagged_items')  
+
+
+class ArticleListingManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().defer('body_text')
+
+
+class ArticleListing(models.Model):
+    """
+    Denormalised copy of what a listing card needs for each live article,
+    kept in sync by a_blog.signals so listings read a single table.
+    """
+    page = models.OneToOneField(ArticlePage, on_delete=models.CASCADE, primary_key=True, related_name='listing')
+    parent = models.ForeignKey(Page, on_delete=models.CASCADE, related_name='+')
+    url_path = models.TextField()
+    title = models.CharField(max_length=255)
+    intro = models.CharField(max_length=80)
+    date = models.DateField()
+    first_published_at = models.DateTimeField()
+    image_url = models.CharField(max_length=255, blank=True)
+    author_name = models.CharField(max_length=150, blank=True)
+    author_username = models.CharField(max_length=150, blank=True)
+    views = models.PositiveIntegerField(default=0)
+    # body without markup, only ever read through search excerpts
+    body_text = models.TextField(blank=True)
+    
+    objects = ArticleListingManager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['parent', '-first_published_at'], name='a_blog_listing_recent_idx'),
+            models.Index(fields=['parent', '-views'], name='a_blog_listing_popular_idx'),
+            models.Index(fields=['-first_published_at'], name='a_blog_listing_all_recent_idx'),
+        ]
+    
+    def __str__(self):
+        return self.title
+
+
+class ArticleListingTag(models.Model):
+    """One row per tag of a listed article, so tag listings are an index range scan."""
+    listing = models.ForeignKey(ArticleListing, on_delete=models.CASCADE, related_name='tags', db_index=False)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='+', db_index=False)
+    first_published_at = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'tag'], name='a_blog_listing_tag_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', '-first_published_at'], name='a_blog_listing_tag_recent_idx'),
+        ]
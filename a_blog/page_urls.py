@@ -0,0 +1,95 @@
+import uuid
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.encoding import iri_to_uri
+from wagtail.models import Site
+
+URLS_VERSION_KEY = 'blog:page-urls:version'
+MEMO_SIZE = 10000
+
+# url_path -> URL memo shared by all requests in this process, dropped
+# whenever the version in the shared cache changes (page moved, slug
+# changed, site edited)
+_memo = {}
+_memo_version = None
+
+
+def get_site_root_paths(request=None):
+    if request is None:
+        return Site.get_site_root_paths()
+    # same attribute Wagtail uses, so page.url and our lookups share one copy per request
+    try:
+        return request._wagtail_cached_site_root_paths
+    except AttributeError:
+        request._wagtail_cached_site_root_paths = Site.get_site_root_paths()
+        return request._wagtail_cached_site_root_paths
+
+
+def serve_prefix():
+    return reverse('wagtail_serve', args=('',))
+
+
+def full_url(url_path, root_paths, prefix=None):
+    """
+    Turn a page's url_path into an absolute URL without loading the page,
+    mirroring Page.get_url_parts for the first matching site. Unicode slugs
+    are percent-encoded the way reverse() would.
+    """
+    if prefix is None:
+        prefix = serve_prefix()
+    for root_path in root_paths:
+        if url_path.startswith(root_path.root_path):
+            return root_path.root_url + iri_to_uri(prefix + url_path[len(root_path.root_path):])
+    return None
+
+
+def parent_url_path(url_path):
+    return url_path[:url_path.rstrip('/').rfind('/') + 1]
+
+
+def get_url_memo(request):
+    global _memo, _memo_version
+    try:
+        return request._blog_url_memo
+    except AttributeError:
+        pass
+    version = cache.get_or_set(URLS_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+    if version != _memo_version or len(_memo) > MEMO_SIZE:
+        _memo, _memo_version = {}, version
+    request._blog_url_memo = _memo
+    return _memo
+
+
+def invalidate_urls():
+    cache.set(URLS_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def relative_url(url_path, request):
+    """
+    Equivalent of page.url for a url_path: site-relative when the page
+    belongs to the current site (or there is only one), absolute otherwise.
+    Site roots and the serve prefix are looked up once, so a listing of
+    cards costs one dictionary hit per card.
+    """
+    memo = get_url_memo(request)
+    site = Site.find_for_request(request)
+    key = (site.pk if site else None, url_path)
+    try:
+        return memo[key]
+    except KeyError:
+        pass
+
+    if 'prefix' not in memo:
+        memo['prefix'] = serve_prefix()
+    root_paths = get_site_root_paths(request)
+    url = None
+    for root_path in root_paths:
+        if url_path.startswith(root_path.root_path):
+            url = iri_to_uri(memo['prefix'] + url_path[len(root_path.root_path):])
+            if len(root_paths) > 1 and (site is None or root_path.site_id != site.pk):
+                url = root_path.root_url + url
+            break
+    memo[key] = url
+    return url
+
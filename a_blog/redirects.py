@@ -0,0 +1,111 @@
+import threading
+import uuid
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from django.core.cache import cache
+from django.utils.encoding import uri_to_iri
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.models import Site
+
+REDIRECTS_VERSION_KEY = 'blog:redirects:version'
+NEGATIVE_CACHE_SIZE = 10000
+SITE_CACHE_SIZE = 1000
+
+_table = None
+_table_version = None
+_sites = OrderedDict()
+_sites_lock = threading.Lock()
+_misses = OrderedDict()
+_misses_lock = threading.Lock()
+
+
+def invalidate_redirects():
+    cache.set(REDIRECTS_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_table():
+    """
+    Return the {(site_id, old_path): entry} map of every redirect, loaded
+    in one query and reloaded only when the shared version key changes.
+    Entries hold the redirect pk and its link once it has been resolved.
+    """
+    global _table, _table_version
+    version = cache.get_or_set(REDIRECTS_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+    if _table is None or version != _table_version:
+        _table = {
+            (site_id, old_path): {'pk': pk, 'is_permanent': is_permanent}
+            for pk, site_id, old_path, is_permanent in Redirect.objects.values_list(
+                'pk', 'site_id', 'old_path', 'is_permanent'
+            )
+        }
+        _table_version = version
+        with _sites_lock:
+            _sites.clear()
+        with _misses_lock:
+            _misses.clear()
+    return _table
+
+
+def _lookup(table, site_id, path):
+    if '\0' in path:
+        return None
+    for candidate in (path, uri_to_iri(path)):
+        # site-specific redirects win over site-ambivalent ones
+        entry = table.get((site_id, candidate)) or table.get((None, candidate))
+        if entry:
+            return entry
+    return None
+
+
+def get_site_id(request):
+    # keyed by the raw Host header, so bounded like _misses against bots
+    # sending a different host on every request
+    host = request.get_host()
+    with _sites_lock:
+        if host in _sites:
+            _sites.move_to_end(host)
+            return _sites[host]
+    site = Site.find_for_request(request)
+    with _sites_lock:
+        _sites[host] = site.pk if site else None
+        if len(_sites) > SITE_CACHE_SIZE:
+            _sites.popitem(last=False)
+    return site.pk if site else None
+
+
+def find_redirect(request):
+    """
+    Return (link, is_permanent) for the request path, or None. Paths without
+    a redirect are remembered in a bounded LRU so repeated probes skip the
+    normalisation work too.
+    """
+    table = get_table()
+    site_id = get_site_id(request)
+    full_path = request.get_full_path()
+    key = (site_id, full_path)
+    with _misses_lock:
+        if key in _misses:
+            _misses.move_to_end(key)
+            return None
+
+    path = Redirect.normalise_path(full_path)
+    entry = _lookup(table, site_id, path)
+    if entry is None:
+        path_without_query = urlparse(path).path
+        if path_without_query != path:
+            entry = _lookup(table, site_id, path_without_query)
+
+    if entry is None:
+        with _misses_lock:
+            _misses[key] = True
+            if len(_misses) > NEGATIVE_CACHE_SIZE:
+                _misses.popitem(last=False)
+        return None
+
+    if 'link' not in entry:
+        redirect = Redirect.objects.select_related('redirect_page').filter(pk=entry['pk']).first()
+        entry['link'] = redirect.link if redirect else None
+    if entry['link'] is None:
+        return None
+    return entry['link'], entry['is_permanent']
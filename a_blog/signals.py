@@ -0,0 +1,154 @@
+from django.apps import apps as global_apps
+from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
+from django.contrib.auth.models import User
+from wagtail.signals import page_published, page_unpublished, page_slug_changed, post_page_move
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.images import get_image_model
+from wagtail.models import Page, PageViewRestriction, Site
+from a_users.models import Profile
+from . import feeds
+from .embeds import resolve_embeds
+from .listings import rebuild_listings, remove_listing, update_listing
+from .models import ArticleListing, ArticlePage
+from .page_urls import invalidate_urls
+from .redirects import invalidate_redirects
+from .static_export import remove_exported
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def page_live_changed(sender, instance, **kwargs):
+    feeds.invalidate(instance)
+
+
+@receiver(page_published, sender=ArticlePage)
+def article_published(sender, instance, **kwargs):
+    update_listing(instance)
+    # resolve embeds now so the first reader doesn't wait on the oEmbed provider
+    resolve_embeds(instance.body)
+
+
+@receiver(page_unpublished, sender=ArticlePage)
+def article_unpublished(sender, instance, **kwargs):
+    remove_listing(instance.pk)
+
+
+@receiver(page_unpublished)
+def page_unexported(sender, instance, **kwargs):
+    remove_exported([instance])
+
+
+@receiver(post_delete, sender=Page)
+def page_deleted(sender, instance, **kwargs):
+    feeds.invalidate(instance)
+    remove_exported([instance])
+
+
+@receiver(post_save, sender=PageViewRestriction)
+def page_restricted(sender, instance, **kwargs):
+    remove_exported(Page.objects.descendant_of(instance.page, inclusive=True).only('pk', 'path'))
+
+
+@receiver(page_slug_changed)
+@receiver(post_page_move)
+def page_url_changed(sender, instance, **kwargs):
+    invalidate_urls()
+    invalidate_redirects()
+    feeds.invalidate_all()
+    rebuild_listings(ArticlePage.objects.descendant_of(instance, inclusive=True))
+    # exports still sit at the old URLs
+    remove_exported(Page.objects.descendant_of(instance, inclusive=True).only('pk', 'path'))
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def site_changed(sender, instance, **kwargs):
+    invalidate_urls()
+    invalidate_redirects()
+    feeds.invalidate_all()
+
+
+@receiver(post_save, sender=Redirect)
+@receiver(post_delete, sender=Redirect)
+def redirect_changed(sender, instance, **kwargs):
+    invalidate_redirects()
+
+
+@receiver(post_save, sender=User)
+def author_renamed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'username' not in update_fields:
+        return
+    ArticleListing.objects.filter(page__owner=instance).update(author_username=instance.username)
+    feeds.invalidate_feeds()
+
+
+@receiver(post_save, sender=Profile)
+def author_profile_changed(sender, instance, **kwargs):
+    ArticleListing.objects.filter(page__owner_id=instance.user_id).update(author_name=instance.name)
+    feeds.invalidate_feeds()
+
+
+@receiver(post_migrate)
+def listings_migrated(sender, apps=global_apps, **kwargs):
+    if sender.label != 'a_blog':
+        return
+    try:
+        apps.get_model('a_blog', 'ArticleListing')
+    except LookupError:
+        # migrated back past the listing table
+        return
+    # the backfill migration leaves card images to us, it can't make renditions
+    missing = ArticlePage.objects.filter(listing__image_url='', image__isnull=False)
+    if missing.exists():
+        rebuild_listings(missing)
+
+
+@receiver(post_save, sender=get_image_model())
+def image_edited(sender, instance, created, **kwargs):
+    # a new focal point or file means a new card rendition
+    if not created:
+        rebuild_listings(ArticlePage.objects.filter(image=instance))
+
+
+@receiver(pre_delete, sender=get_image_model())
+def image_deleted(sender, instance, **kwargs):
+    ArticleListing.objects.filter(page__image=instance).update(image_url='')
+
+
+@receiver(post_delete, sender=get_image_model().get_rendition_model())
+def rendition_deleted(sender, instance, **kwargs):
+    if instance.filter_spec == ArticlePage.card_rendition:
+        rebuild_listings(ArticlePage.objects.filter(image_id=instance.image_id))
+
+
+@receiver(post_save, sender=get_image_model())
+def image_uploaded(sender, instance, created, **kwargs):
+    # the storage already shares the file with an identical upload; share its
+    # renditions too so they aren't generated again
+    if not created or not instance.file_hash:
+        return
+    source = (
+        sender.objects.filter(
+            file_hash=instance.file_hash,
+            focal_point_x=instance.focal_point_x,
+            focal_point_y=instance.focal_point_y,
+            focal_point_width=instance.focal_point_width,
+            focal_point_height=instance.focal_point_height,
+        )
+        .exclude(pk=instance.pk)
+        .first()
+    )
+    if source is None:
+        return
+    Rendition = sender.get_rendition_model()
+    Rendition.objects.bulk_create(
+        [
+            Rendition(
+                image=instance, filter_spec=rendition.filter_spec, file=rendition.file.name,
+                width=rendition.width, height=rendition.height, focal_point_key=rendition.focal_point_key,
+            )
+            for rendition in source.renditions.all()
+        ],
+        ignore_conflicts=True,
+    )
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import re
+import shutil
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles import finders
+from django.template.response import TemplateResponse
+from django.test import RequestFactory
+from wagtail.models import Page
+
+MANIFEST_NAME = '.manifest.json'
+STATIC_PREFIX = '/' + settings.STATIC_URL.lstrip('/')
+FIND_STATIC = re.compile(r'(["\'(])' + re.escape(STATIC_PREFIX) + r'([^"\'()?#\s]+)')
+
+_hashed_assets = {}
+
+
+def export_file_path(root, path, tag=None):
+    """
+    Map a request path (and optional ?tag=) onto a file under the export
+    root. Directory-style paths become index.html, tag listings sit next to
+    their page as index.tag-<tag>.html.
+    """
+    relative = path.lstrip('/')
+    if any(part.startswith('.') for part in relative.split('/')):
+        # the manifest and other dotfiles are never pages
+        return None
+    if not relative or relative.endswith('/'):
+        name = f"index.tag-{quote(tag, safe='')}.html" if tag else 'index.html'
+        relative += name
+    elif tag:
+        return None
+    target = (Path(root) / relative).resolve()
+    if not target.is_relative_to(Path(root).resolve()):
+        return None
+    return target
+
+
+def hashed_asset(root, name):
+    """
+    Copy a static file into the export as name.<hash>.ext and return the
+    new name, so exported pages can be cached forever by browsers and CDNs.
+    """
+    if name not in _hashed_assets:
+        source = finders.find(name)
+        if source is None:
+            _hashed_assets[name] = name
+        else:
+            content = Path(source).read_bytes()
+            digest = hashlib.md5(content, usedforsecurity=False).hexdigest()[:12]
+            stem, dot, ext = name.rpartition('.')
+            hashed = f'{stem}.{digest}.{ext}' if dot else f'{name}.{digest}'
+            target = Path(root) / STATIC_PREFIX.strip('/') / hashed
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(source, target)
+            _hashed_assets[name] = hashed
+    return _hashed_assets[name]
+
+
+def render_page(page, path, tag=None):
+    host = page.get_site().hostname
+    request = RequestFactory(SERVER_NAME=host).get(path, {'tag': tag} if tag else {})
+    request.user = AnonymousUser()
+    # Page.serve would count a view, so render the template response directly
+    response = TemplateResponse(request, page.get_template(request), page.get_context(request))
+    return response.render().content.decode()
+
+
+def export_page(root, page_id, tag=None):
+    """
+    Render one live page (or one tag listing of a BlogPage) into the export
+    root. Runs in the command's process pool.
+    """
+    page = Page.objects.get(pk=page_id).specific
+    path = page.get_url_parts()[2]
+    html = render_page(page, path, tag)
+    html = FIND_STATIC.sub(lambda m: m.group(1) + STATIC_PREFIX + hashed_asset(root, m.group(2)), html)
+    target = export_file_path(root, path, tag)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(html, encoding='utf-8')
+    return str(target.relative_to(Path(root).resolve()))
+
+
+def remove_exported(pages):
+    """
+    Delete the exported files of pages, their tag listings and their parent
+    listings, and drop them from the manifest, so unpublished, deleted or
+    private pages stop being served before export_static runs again.
+    """
+    root = getattr(settings, 'BLOG_STATIC_EXPORT_ROOT', None)
+    if not root:
+        return
+    manifest_path = Path(root) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return
+    page_ids = set()
+    parent_paths = set()
+    for page in pages:
+        page_ids.add(str(page.pk))
+        parent_paths.add(page.path[:-Page.steplen])
+    page_ids.update(str(pk) for pk in Page.objects.filter(path__in=parent_paths).values_list('pk', flat=True))
+
+    manifest = json.loads(manifest_path.read_text())
+    removed = [key for key in manifest if key.partition('?tag=')[0] in page_ids]
+    for key in removed:
+        (Path(root) / manifest.pop(key)['file']).unlink(missing_ok=True)
+    if removed:
+        manifest_path.write_text(json.dumps(manifest))
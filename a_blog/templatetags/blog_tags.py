@@ -0,0 +1,34 @@
+from django import template
+from django.urls import reverse
+
+from a_blog.page_urls import get_url_memo, parent_url_path, relative_url
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, page):
+    request = context.get('request')
+    if request is None:
+        return page.url
+    return relative_url(page.url_path, request)
+
+
+@register.simple_tag(takes_context=True)
+def parent_url(context, page):
+    request = context.get('request')
+    if request is None:
+        return page.get_parent().url
+    return relative_url(parent_url_path(page.url_path), request)
+
+
+@register.simple_tag(takes_context=True)
+def profile_url(context, user):
+    request = context.get('request')
+    if request is None:
+        return reverse('profile', args=(user.username,))
+    memo = get_url_memo(request)
+    key = ('profile', user.username)
+    if key not in memo:
+        memo[key] = reverse('profile', args=(user.username,))
+    return memo[key]
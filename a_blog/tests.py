@@ -1,3 +1,735 @@
-from django.test import TestCase
+import gzip
+import json
+import re
+import socket
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from importlib import import_module
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import CommandError, call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import OperationalError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.feedgenerator import rfc3339_date
+from django.utils.text import slugify
+from taggit.models import Tag
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.documents.models import Document
+from wagtail.embeds.finders import get_finders
+from wagtail.images.models import Image
+from wagtail.images.rect import Rect
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page, PageViewRestriction, Site
+from wagtail.rich_text import expand_db_html
+
+from a_core.sessions import PURGE_KEY, SessionStore, check_session_cache
+
+from . import redirects
+from .compression import minify_html, negotiate
+from .embeds import resolve_embeds
+from .listings import EXCERPT_LENGTH
+from .management.commands.loadtest import route_for
+from .models import ArticleListing, ArticleListingTag, ArticlePage, BlogPage
+from .static_export import MANIFEST_NAME, export_page
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+VIDEO_URL = 'https://video.local/watch/1'
+RICH_URL = 'https://video.local/card/1'
+DEAD_URL = 'https://video.local/gone/1'
+
+
+class OEmbedHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        url = parse_qs(urlparse(self.path).query)['url'][0]
+        OEmbedHandler.requests.append(url)
+        if url == DEAD_URL:
+            self.send_error(404)
+            return
+        if url == VIDEO_URL:
+            data = {
+                'type': 'video', 'title': 'Local video', 'width': 640, 'height': 360,
+                'thumbnail_url': 'https://video.local/thumb/1.jpg',
+                'html': '<iframe src="https://video.local/player/1"></iframe>',
+            }
+        else:
+            data = {'type': 'rich', 'title': 'Card', 'html': '<iframe src="https://video.local/card-frame/1"></iframe>'}
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def embed_tag(url):
+    return f'<embed embedtype="media" url="{url}"/>'
+
+
+class EmbedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(('127.0.0.1', 0), OEmbedHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        finders = [{
+            'class': 'wagtail.embeds.finders.oembed',
+            'providers': [{
+                'endpoint': f'http://127.0.0.1:{cls.server.server_port}/oembed',
+                'urls': [r'^https://video\.local/.+$'],
+            }],
+        }]
+        cls.settings_override = override_settings(WAGTAILEMBEDS_FINDERS=finders)
+        cls.settings_override.enable()
+        get_finders.cache_clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        get_finders.cache_clear()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        OEmbedHandler.requests = []
+
+    def test_video_renders_click_to_load_facade(self):
+        html = expand_db_html(embed_tag(VIDEO_URL))
+        self.assertIn('class="embed-facade"', html)
+        self.assertIn('src="https://video.local/thumb/1.jpg"', html)
+        # the player iframe is only inert template content until clicked
+        self.assertIn('<template><iframe loading="lazy" src="https://video.local/player/1"></iframe></template>', html)
+
+    def test_embed_without_thumbnail_gets_lazy_iframe(self):
+        html = expand_db_html(embed_tag(RICH_URL))
+        self.assertNotIn('embed-facade', html)
+        self.assertIn('<iframe loading="lazy" src="https://video.local/card-frame/1">', html)
+
+    def test_rendered_embed_is_cached(self):
+        expand_db_html(embed_tag(VIDEO_URL))
+        with self.assertNumQueries(0):
+            html = expand_db_html(embed_tag(VIDEO_URL))
+        self.assertIn('embed-facade', html)
+        self.assertEqual(OEmbedHandler.requests, [VIDEO_URL])
+
+    def test_failed_embed_is_not_retried_on_every_render(self):
+        self.assertEqual(expand_db_html(embed_tag(DEAD_URL)), '')
+        self.assertEqual(expand_db_html(embed_tag(DEAD_URL)), '')
+        self.assertEqual(OEmbedHandler.requests, [DEAD_URL])
+
+        # publishing retries it
+        resolve_embeds(embed_tag(DEAD_URL))
+        self.assertEqual(OEmbedHandler.requests, [DEAD_URL, DEAD_URL])
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_publish_pre_resolves_embeds(self):
+        image = Image.objects.create(title='Hero', file=get_test_image_file())
+        blog = Page.get_first_root_node().add_child(instance=BlogPage(title='Blog', slug='blog'))
+        article = blog.add_child(instance=ArticlePage(
+            title='Video post', slug='video-post', intro='Intro', image=image, live=False,
+            body=f'<p>Watch</p>{embed_tag(VIDEO_URL)}{embed_tag(RICH_URL)}',
+        ))
+        self.assertEqual(OEmbedHandler.requests, [])
+
+        article.save_revision().publish()
+        self.assertCountEqual(OEmbedHandler.requests, [VIDEO_URL, RICH_URL])
+
+        with self.assertNumQueries(0):
+            expand_db_html(article.body)
+        self.assertEqual(len(OEmbedHandler.requests), 2)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BlogTestCase(TestCase):
+    """A BlogPage under the default site's root, with an author and an image."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.image = Image.objects.create(title='Hero', file=get_test_image_file())
+        cls.author = User.objects.create_user('alice', 'alice@example.com', 'password')
+        cls.author.profile.displayname = 'Alice'
+        cls.author.profile.save()
+        root = Site.objects.get(is_default_site=True).root_page
+        cls.blog = root.add_child(instance=BlogPage(title='Blog', slug='blog'))
+
+    def setUp(self):
+        cache.clear()
+
+    def add_article(self, title, slug=None, tags=(), **kwargs):
+        kwargs.setdefault('intro', 'Intro')
+        kwargs.setdefault('image', self.image)
+        kwargs.setdefault('owner', self.author)
+        article = self.blog.add_child(instance=ArticlePage(title=title, slug=slug or slugify(title), live=False, **kwargs))
+        article.tags.add(*tags)
+        article.save_revision().publish()
+        return ArticlePage.objects.get(pk=article.pk)
+
+
+class FeedTests(BlogTestCase):
+    def test_sitemap_lists_articles_with_encoded_unicode_slugs(self):
+        self.add_article('Hello wörld', slug='hello-wörld')
+        body = b''.join(self.client.get('/blog/sitemap-0.xml').streaming_content).decode()
+        self.assertIn('<loc>http://localhost/blog/blog/hello-w%C3%B6rld/</loc>', body)
+        self.assertIn('<loc>http://localhost/blog/blog/</loc>', body)
+
+    def test_rss_credits_author_with_dc_creator(self):
+        self.add_article('First')
+        body = b''.join(self.client.get('/blog/feed/rss/').streaming_content).decode()
+        self.assertIn('xmlns:dc="http://purl.org/dc/elements/1.1/"', body)
+        self.assertIn('<dc:creator>Alice</dc:creator>', body)
+        self.assertNotIn('<author>', body)
+
+    def test_feed_is_cached_until_publish(self):
+        self.add_article('First')
+        b''.join(self.client.get('/blog/feed/atom/').streaming_content)
+        with self.assertNumQueries(0):
+            body = b''.join(self.client.get('/blog/feed/atom/').streaming_content).decode()
+        self.assertNotIn('Second', body)
+
+        self.add_article('Second')
+        body = b''.join(self.client.get('/blog/feed/atom/').streaming_content).decode()
+        self.assertIn('Second', body)
+
+    def test_cached_documents_ignore_the_host_header(self):
+        self.add_article('First')
+        for path in ('/blog/sitemap.xml', '/blog/feed/rss/', '/blog/feed/atom/'):
+            b''.join(self.client.get(path, HTTP_HOST='evil.example').streaming_content)
+            body = b''.join(self.client.get(path).streaming_content).decode()
+            self.assertNotIn('evil.example', body)
+            self.assertIn('http://localhost/', body)
+
+    def test_atom_updated_is_the_latest_revision(self):
+        first = self.add_article('First')
+        self.add_article('Second')
+        first.save_revision().publish()
+        first.refresh_from_db()
+        body = b''.join(self.client.get('/blog/feed/atom/').streaming_content).decode()
+        self.assertIn('<updated>%s</updated>\n' % rfc3339_date(first.last_published_at), body)
+
+    def test_author_rename_refreshes_feeds(self):
+        self.add_article('First')
+        b''.join(self.client.get('/blog/feed/rss/').streaming_content)
+        self.author.profile.displayname = 'Alice B.'
+        self.author.profile.save()
+        body = b''.join(self.client.get('/blog/feed/rss/').streaming_content).decode()
+        self.assertIn('<dc:creator>Alice B.</dc:creator>', body)
+
+
+class ImportArticlesTests(BlogTestCase):
+    def import_rows(self, rows, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', encoding='utf-8') as stream:
+            stream.writelines(json.dumps(row) + '\n' for row in rows)
+            stream.flush()
+            stdout, stderr = StringIO(), StringIO()
+            try:
+                call_command(
+                    'import_articles', self.blog.pk, stream.name, '--skip-index', *args, stdout=stdout, stderr=stderr,
+                )
+            finally:
+                self.stderr = stderr.getvalue()
+
+    def row(self, title, **kwargs):
+        return {'title': title, 'intro': 'Intro', 'image': self.image.pk, 'owner': 'alice', **kwargs}
+
+    def test_import_keeps_tree_consistent(self):
+        self.add_article('Existing')
+        self.import_rows([self.row(f'Post {number}', tags=['django']) for number in range(5)], '--batch-size', '2')
+
+        self.assertEqual(Page.find_problems(), ([], [], [], [], []))
+        blog = Page.objects.get(pk=self.blog.pk)
+        self.assertEqual(blog.numchild, 6)
+        self.assertEqual(
+            [page.slug for page in blog.get_children()],
+            ['existing', 'post-0', 'post-1', 'post-2', 'post-3', 'post-4'],
+        )
+        self.assertEqual(ArticleListing.objects.filter(parent=self.blog, tags__tag__name='django').count(), 5)
+        self.assertEqual(self.client.get('/blog/blog/post-3/').status_code, 200)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        rows = [
+            self.row('Good'),
+            {'intro': 'No title', 'image': self.image.pk, 'owner': 'alice'},
+            self.row('No image', image=None),
+            self.row('Stranger', owner='nobody'),
+            self.row('Long intro', intro='x' * 81),
+            self.row('Bad date', date='2024-02-31'),
+            self.row('Bad live', live='maybe'),
+        ]
+        with self.assertRaisesMessage(CommandError, '6 invalid rows were skipped'):
+            self.import_rows(rows)
+
+        self.assertEqual(list(ArticlePage.objects.values_list('title', flat=True)), ['Good'])
+        for message in ['Row 2: missing title', 'Row 3: missing image', 'Row 4: unknown owner',
+                        'Row 5: intro is longer than 80', "Row 6: invalid date '2024-02-31'",
+                        "Row 7: invalid live 'maybe'"]:
+            self.assertIn(message, self.stderr)
+
+    def test_round_trip_keeps_drafts_unpublished(self):
+        self.add_article('Published')
+        self.add_article('Withdrawn').unpublish()
+        self.blog.add_child(instance=ArticlePage(
+            title='Draft', slug='draft', intro='Intro', image=self.image, owner=self.author, live=False,
+        ))
+        other = Site.objects.get(is_default_site=True).root_page.add_child(instance=BlogPage(title='Copy', slug='copy'))
+        for suffix in ('.jsonl', '.csv'):
+            with tempfile.NamedTemporaryFile(suffix=suffix) as stream:
+                call_command('export_articles', self.blog.pk, stream.name, stderr=StringIO())
+                call_command('import_articles', other.pk, stream.name, '--skip-index', stdout=StringIO())
+            copies = ArticlePage.objects.child_of(other)
+            self.assertEqual(
+                dict(copies.values_list('title', 'live')), {'Published': True, 'Withdrawn': False, 'Draft': False}
+            )
+            self.assertIsNone(copies.get(title='Draft').first_published_at)
+            self.assertEqual(list(ArticleListing.objects.filter(parent=other).values_list('title', flat=True)), ['Published'])
+            copies.delete()
+
+    def test_unknown_default_owner_is_a_command_error(self):
+        with self.assertRaisesMessage(CommandError, 'User nobody does not exist'):
+            self.import_rows([self.row('Post', owner=None)], '--owner', 'nobody')
+
+
+class PageUrlTests(BlogTestCase):
+    def test_listing_links_match_page_url(self):
+        article = self.add_article('Hello wörld', slug='hello-wörld')
+        response = self.client.get('/blog/blog/')
+        self.assertContains(response, f'href="{article.url}"')
+        self.assertEqual(article.url, '/blog/blog/hello-w%C3%B6rld/')
+
+    def test_listing_queries_do_not_grow_with_articles(self):
+        self.add_article('First')
+        self.client.get('/blog/blog/')
+        with CaptureQueriesContext(connection) as one_article:
+            self.client.get('/blog/blog/')
+        for number in range(5):
+            self.add_article(f'Post {number}')
+        self.client.get('/blog/blog/')
+        with CaptureQueriesContext(connection) as six_articles:
+            self.client.get('/blog/blog/')
+        self.assertEqual(len(one_article), len(six_articles))
+
+    def test_slug_change_refreshes_memoised_urls(self):
+        article = self.add_article('First')
+        self.assertContains(self.client.get('/blog/blog/'), 'href="/blog/blog/first/"')
+        article.slug = 'renamed'
+        article.save_revision().publish()
+        response = self.client.get('/blog/blog/')
+        self.assertContains(response, 'href="/blog/blog/renamed/"')
+        self.assertNotContains(response, 'href="/blog/blog/first/"')
+
+
+class RedirectTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+
+    def test_redirect_is_served_from_memory(self):
+        Redirect.objects.create(old_path='/old', redirect_link='/blog/blog/')
+        self.assertRedirects(self.client.get('/old/'), '/blog/blog/', status_code=301, fetch_redirect_response=False)
+        request = self.factory.get('/old/')
+        with self.assertNumQueries(0):
+            self.assertEqual(redirects.find_redirect(request), ('/blog/blog/', True))
+
+    def test_misses_are_cached_until_redirects_change(self):
+        request = self.factory.get('/missing/')
+        self.assertIsNone(redirects.find_redirect(request))
+        with self.assertNumQueries(0):
+            self.assertIsNone(redirects.find_redirect(request))
+
+        Redirect.objects.create(old_path='/missing', redirect_link='/blog/blog/', is_permanent=False)
+        self.assertEqual(redirects.find_redirect(request), ('/blog/blog/', False))
+
+    def test_site_memo_is_bounded(self):
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for number in range(redirects.SITE_CACHE_SIZE + 50):
+                redirects.find_redirect(self.factory.get('/missing/', HTTP_HOST=f'bot{number}.example.com'))
+        self.assertEqual(len(redirects._sites), redirects.SITE_CACHE_SIZE)
+
+    def test_anonymous_404_body_is_rendered_once(self):
+        self.assertEqual(self.client.get('/no-such-page/').status_code, 404)
+        with patch('a_blog.views.render_to_string') as render:
+            response = self.client.get('/no-such-page-either/')
+        self.assertEqual(response.status_code, 404)
+        render.assert_not_called()
+
+
+class SessionTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        # logins would start the background purge against the test database
+        cache.set(PURGE_KEY, True)
+
+    def test_suite_does_not_use_the_real_cache(self):
+        self.assertNotEqual(Path(settings.CACHES['default']['LOCATION']), settings.BASE_DIR / '.cache')
+
+    def test_anonymous_article_view_creates_no_session(self):
+        article = self.add_article('First')
+        response = self.client.get('/blog/blog/first/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.client.get('/blog/blog/first/')
+        self.assertEqual(ArticlePage.objects.get(pk=article.pk).views, 1)
+        self.assertEqual(ArticleListing.objects.get(pk=article.pk).views, 1)
+
+    def test_authenticated_changes_are_written_through(self):
+        self.client.force_login(self.author)
+        session = self.client.session
+        session['foo'] = 'bar'
+        session.save()
+        cache.clear()
+        self.assertEqual(SessionStore(session.session_key).load().get('foo'), 'bar')
+
+    def test_unchanged_session_is_written_once_per_interval(self):
+        self.client.force_login(self.author)
+        session = self.client.session
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_logout_ends_session_everywhere(self):
+        self.client.force_login(self.author)
+        session_key = self.client.session.session_key
+        self.client.logout()
+        self.assertFalse(Session.objects.filter(session_key=session_key).exists())
+        self.assertNotIn(SESSION_KEY, SessionStore(session_key).load())
+
+    def test_per_process_cache_is_refused(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            with self.assertRaises(ImproperlyConfigured):
+                check_session_cache()
+
+    def test_failed_purge_is_logged(self):
+        with patch.object(SessionStore, 'clear_expired', side_effect=OperationalError('database table is locked')):
+            with self.assertLogs('a_core.sessions', 'WARNING'):
+                SessionStore.purge_in_background()
+
+
+@override_settings(BLOG_STATIC_EXPORT_ROOT=tempfile.mkdtemp())
+class StaticExportTests(BlogTestCase):
+    def export(self, *pages):
+        # export_static renders in spawned processes that can't see the test database
+        root = settings.BLOG_STATIC_EXPORT_ROOT
+        manifest = {str(page.pk): {'signature': '', 'file': export_page(root, page.pk)} for page in pages}
+        Path(root, MANIFEST_NAME).write_text(json.dumps(manifest))
+
+    def test_exported_page_is_served_without_rendering(self):
+        article = self.add_article('First')
+        self.export(self.blog, article)
+        ArticlePage.objects.filter(pk=article.pk).update(title='Changed')
+        with self.assertNumQueries(0):
+            response = self.client.get('/blog/blog/first/')
+        self.assertContains(response, 'First')
+
+    def test_unpublished_page_stops_being_served(self):
+        article = self.add_article('First')
+        self.export(self.blog, article)
+        article.unpublish()
+        self.assertEqual(self.client.get('/blog/blog/first/').status_code, 404)
+        # the parent listing linked to it, so it is rendered live again
+        self.assertNotContains(self.client.get('/blog/blog/'), 'First')
+        self.assertEqual(json.loads(Path(settings.BLOG_STATIC_EXPORT_ROOT, MANIFEST_NAME).read_text()), {})
+
+    def test_deleted_and_private_pages_stop_being_served(self):
+        first = self.add_article('First')
+        second = self.add_article('Second')
+        self.export(self.blog, first, second)
+        first.delete()
+        self.assertEqual(self.client.get('/blog/blog/first/').status_code, 404)
+
+        PageViewRestriction.objects.create(page=second, restriction_type=PageViewRestriction.LOGIN)
+        response = self.client.get('/blog/blog/second/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_dotfiles_are_not_served(self):
+        self.export(self.blog)
+        self.assertEqual(self.client.get(f'/{MANIFEST_NAME}').status_code, 404)
+
+
+class ListingTests(BlogTestCase):
+    def test_tag_listing_reads_tag_index(self):
+        self.add_article('First', tags=['django'])
+        self.add_article('Second', tags=['django', 'python'])
+        self.add_article('Third', tags=['python'])
+        response = self.client.get('/blog/blog/', {'tag': 'django'})
+        self.assertEqual([article.title for article in response.context['articles']], ['Second', 'First'])
+
+        tag_id = Tag.objects.get(name='django').pk
+        articles = ArticleListing.objects.filter(tags__tag_id=tag_id).order_by('-tags__first_published_at')
+        self.assertIn('a_blog_listing_tag_recent_idx', articles.explain())
+
+    def test_unknown_tag_lists_nothing(self):
+        self.add_article('First')
+        response = self.client.get('/blog/blog/', {'tag': 'nonexistent'})
+        self.assertEqual(list(response.context['articles']), [])
+
+    def test_republish_replaces_tags(self):
+        article = self.add_article('First', tags=['django'])
+        article.tags.set(['python'])
+        article.save_revision().publish()
+        self.assertEqual(list(ArticleListingTag.objects.values_list('tag__name', flat=True)), ['python'])
+
+    def test_migration_backfills_listings(self):
+        self.add_article('First', tags=['django'])
+        expected = list(ArticleListing.objects.values_list('title', 'image_url', 'author_name', 'body_text'))
+        ArticleListing.objects.all().delete()
+
+        migration = import_module('a_blog.migrations.0004_articlelistingtag')
+        migration.backfill_listings(apps, None)
+        self.assertEqual(ArticleListing.objects.get().image_url, '')
+        self.assertEqual(ArticleListing.objects.filter(tags__tag__name='django').count(), 1)
+
+        # the card images come from the post_migrate handler
+        emit_post_migrate_signal(0, False, 'default')
+        self.assertEqual(
+            list(ArticleListing.objects.values_list('title', 'image_url', 'author_name', 'body_text')), expected
+        )
+
+    def test_image_changes_refresh_card_urls(self):
+        article = self.add_article('First')
+        old_url = ArticleListing.objects.get(pk=article.pk).image_url
+
+        self.image.set_focal_point(Rect(10, 10, 50, 50))
+        self.image.save()
+        new_url = ArticleListing.objects.get(pk=article.pk).image_url
+        self.assertNotEqual(new_url, old_url)
+        self.assertEqual(new_url, self.image.get_rendition(ArticlePage.card_rendition).url)
+
+        self.image.renditions.all().delete()
+        self.assertEqual(ArticleListing.objects.get(pk=article.pk).image_url, new_url)
+        self.assertTrue(self.image.renditions.filter(filter_spec=ArticlePage.card_rendition).exists())
+
+        self.image.delete()
+        self.assertEqual(ArticleListing.objects.get(pk=article.pk).image_url, '')
+        self.assertNotContains(self.client.get('/blog/blog/'), '<img class="w-full rounded-lg" src=""')
+
+
+class SearchExcerptTests(BlogTestCase):
+    def test_results_show_highlighted_escaped_excerpt(self):
+        body = '<p>' + 'Lorem ipsum dolor sit amet. ' * 10 + 'Caching <b>&lt;script&gt;</b> pages with Django is easy.</p>'
+        # the search index is updated on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_article('Caching', body=body)
+        response = self.client.get('/blog/search/', {'query': 'django caching'})
+        excerpt = str(response.context['articles'][0].excerpt_html)
+        self.assertTrue(excerpt.startswith('&hellip;'))
+        self.assertIn('<mark>Caching</mark> &lt;script&gt; pages with <mark>Django</mark> is easy.', excerpt)
+
+    def test_excerpt_is_cut_on_word_boundaries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_article('Long', body='<p>' + 'needle haystack ' * 40 + '</p>')
+        response = self.client.get('/blog/search/', {'query': 'needle'})
+        excerpt = str(response.context['articles'][0].excerpt_html)
+        self.assertTrue(excerpt.startswith('<mark>needle</mark>'))
+        self.assertTrue(excerpt.endswith('haystack&hellip;') or excerpt.endswith('</mark>&hellip;'))
+        self.assertLessEqual(len(re.sub(r'<[^>]+>|&hellip;', '', excerpt)), EXCERPT_LENGTH)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class StorageTests(TestCase):
+    def test_identical_images_share_a_file_until_the_last_is_deleted(self):
+        first = Image.objects.create(title='First', file=get_test_image_file(filename='first.png'))
+        second = Image.objects.create(title='Second', file=get_test_image_file(filename='second.png'))
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertRegex(first.file.name, r'^original_images/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+
+        path = Path(first.file.path)
+        # Wagtail removes files on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(path.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(path.exists())
+
+    def test_documents_keep_their_names(self):
+        document = Document.objects.create(title='Report', file=ContentFile(b'report', name='annual-report.pdf'))
+        self.assertEqual(document.filename, 'annual-report.pdf')
+
+    def test_dedupe_media_moves_images_and_leaves_documents(self):
+        document = Document.objects.create(title='Minutes', file=ContentFile(b'minutes', name='minutes.pdf'))
+        image = Image.objects.create(title='Hero', file=get_test_image_file())
+        legacy = FileSystemStorage().save('original_images/legacy.png', get_test_image_file())
+        Image.objects.filter(pk=image.pk).update(file=legacy)
+
+        for _ in range(2):
+            call_command('dedupe_media', stdout=StringIO())
+        document.refresh_from_db()
+        image.refresh_from_db()
+        self.assertEqual(document.file.name, 'documents/minutes.pdf')
+        self.assertTrue(document.file.storage.exists('documents/minutes.pdf'))
+        self.assertRegex(image.file.name, r'^original_images/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertFalse(FileSystemStorage().exists(legacy))
+
+
+class ProfileImportsTests(TestCase):
+    def test_public_settings_drop_admin_apps(self):
+        public = import_module('a_core.settings_public')
+        self.assertFalse(set(public.ADMIN_ONLY_APPS) & set(public.INSTALLED_APPS))
+        self.assertIn('wagtail', public.INSTALLED_APPS)
+
+    def test_reports_boot_imports(self):
+        stdout = StringIO()
+        call_command('profile_imports', '--settings-module', 'a_core.settings_public', '--limit', '2', stdout=stdout)
+        output = stdout.getvalue()
+        self.assertRegex(output, r'^a_core\.settings_public: \d+ modules, \d+ ms importing')
+        self.assertIn('Self time by top-level package (ms):', output)
+
+
+class StubSiteHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.startswith('/blog/search/'):
+            # streamed like the feeds, to exercise chunked decoding
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in (b'hello ', b'world'):
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+            return
+        status = 500 if self.path.startswith('/@') else 200
+        body = b'x' * 100
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LoadTestTests(TestCase):
+    def test_routes_are_classified(self):
+        self.assertEqual(route_for('/blog/blog/'), 'blog')
+        self.assertEqual(route_for('/blog/blog/?tag=django'), 'tag')
+        self.assertEqual(route_for('/blog/search/?query=x'), 'search')
+        self.assertEqual(route_for('/blog/blog/first/'), 'article')
+        self.assertEqual(route_for('/@alice/'), 'profile')
+        self.assertEqual(route_for('/static/app.css'), 'other')
+
+    def test_replay_reports_per_route(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubSiteHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        log = [
+            '127.0.0.1 - - [19/Oct/2026:06:03:40 +0000] "GET /blog/blog/first/ HTTP/1.1" 200 100',
+            '127.0.0.1 - - [19/Oct/2026:06:03:40 +0000] "GET /blog/blog/second/ HTTP/1.1" 200 100',
+            '127.0.0.1 - - [19/Oct/2026:06:03:41 +0000] "GET /blog/search/?query=x HTTP/1.1" 200 11',
+            '127.0.0.1 - - [19/Oct/2026:06:03:41 +0000] "GET /@alice/ HTTP/1.1" 200 100',
+            '127.0.0.1 - - [19/Oct/2026:06:03:41 +0000] "POST /accounts/login/ HTTP/1.1" 302 0',
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.log') as stream:
+            stream.write('\n'.join(log) + '\n')
+            stream.flush()
+            stdout = StringIO()
+            call_command(
+                'loadtest', '--url', f'http://127.0.0.1:{server.server_port}', '--replay', stream.name,
+                '--concurrency', '2', stdout=stdout,
+            )
+        rows = {line.split()[0]: line.split() for line in stdout.getvalue().splitlines()[1:-1]}
+        self.assertEqual(rows['article'][1], '2')
+        self.assertEqual(rows['search'][1], '1')
+        self.assertEqual(rows['search'][-1], '0')
+        self.assertEqual(rows['profile'][-1], '1')
+        self.assertIn('4 requests', stdout.getvalue())
+
+    def test_bad_arguments_are_command_errors(self):
+        for args, message in [
+            (['--mix', 'blog=1,articles=2'], "Unknown route 'articles'"),
+            (['--mix', 'blog'], "Invalid weight '' for blog"),
+            (['--mix', 'blog=0'], 'at least one route with a positive weight'),
+            (['--url', 'https://127.0.0.1'], '--url must be an http:// URL'),
+        ]:
+            with self.assertRaisesMessage(CommandError, message):
+                call_command('loadtest', *args, stdout=StringIO())
+
+    def test_clients_stop_when_the_server_is_down(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        with tempfile.NamedTemporaryFile('w', suffix='.log') as stream:
+            stream.write('"GET /blog/blog/ HTTP/1.1" 200 100\n' * 1000)
+            stream.flush()
+            stdout = StringIO()
+            with self.assertRaisesMessage(CommandError, '2 clients stopped after 5 failed requests in a row'):
+                call_command(
+                    'loadtest', '--url', f'http://127.0.0.1:{port}', '--replay', stream.name,
+                    '--concurrency', '2', stdout=stdout,
+                )
+        self.assertIn('10 requests', stdout.getvalue())
+
+    @override_settings(MEDIA_ROOT=MEDIA_ROOT)
+    def test_seed_builds_a_fixture_blog(self):
+        call_command('seed_loadtest', '--articles', '20', '--users', '3', '--tags', '5', stdout=StringIO())
+        blog = BlogPage.objects.get(slug='loadtest')
+        self.assertEqual(ArticleListing.objects.filter(parent=blog).count(), 20)
+        authors = set(ArticleListing.objects.values_list('author_username', flat=True))
+        self.assertLessEqual(authors, {'loadtest0', 'loadtest1', 'loadtest2'})
+        self.assertEqual(self.client.get(blog.url).status_code, 200)
+
+
+class CompressionTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_article('First', body='<p>' + 'Some text. ' * 100 + '</p>')
+
+    def test_negotiation_follows_q_values(self):
+        encodings = ['br', 'zstd', 'gzip']
+        self.assertEqual(negotiate('gzip, br, zstd', encodings), 'br')
+        self.assertEqual(negotiate('br;q=0.5, gzip', encodings), 'gzip')
+        self.assertEqual(negotiate('*;q=0.1, zstd;q=0.2', encodings), 'zstd')
+        self.assertIsNone(negotiate('gzip;q=0, identity', encodings))
+        self.assertIsNone(negotiate('', encodings))
+
+    def test_minify_keeps_raw_blocks(self):
+        html = '<div>\n    <!-- note -->\n    <pre>  a\n    b</pre>\n<script>if (a)\n    b();</script></div>'
+        self.assertEqual(minify_html(html), '<div>\n<pre>  a\n    b</pre>\n<script>if (a)\n    b();</script></div>')
+
+    def test_anonymous_pages_are_cached(self):
+        with patch.object(cache, 'set', wraps=cache.set) as cache_set, \
+                patch('a_blog.middleware.minify_html', wraps=minify_html) as minify:
+            first = self.client.get(self.blog.url, HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get(self.blog.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', first['Vary'])
+        self.assertEqual(first.content, second.content)
+        self.assertIn(b'First', gzip.decompress(first.content))
+        self.assertEqual(minify.call_count, 1)
+        keys = [call.args[0] for call in cache_set.call_args_list]
+        self.assertEqual(len([key for key in keys if key.startswith('blog:compressed:gzip:')]), 1)
+
+    def test_pages_with_csrf_token_are_padded_and_not_cached(self):
+        with patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            first = self.client.get('/accounts/login/', HTTP_ACCEPT_ENCODING='br, zstd, gzip')
+            second = self.client.get('/accounts/login/', HTTP_ACCEPT_ENCODING='br, zstd, gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertIn(b'csrfmiddlewaretoken', gzip.decompress(first.content))
+        self.assertNotEqual(first.content, second.content)
+        keys = [call.args[0] for call in cache_set.call_args_list]
+        self.assertFalse([key for key in keys if key.startswith('blog:compressed:')])
+
+    def test_streaming_responses_are_left_alone(self):
+        response = self.client.get('/blog/feed/rss/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.has_header('Content-Encoding'))
@@ -1,13 +1,23 @@
+from django.apps import apps
 from django.urls import path, include
-from wagtail.admin import urls as wagtailadmin_urls
 from wagtail.documents import urls as wagtaildocs_urls
 from wagtail import urls as wagtail_urls
 
-from .views import *
-urlpatterns = [
-    path('cms/', include(wagtailadmin_urls)),
+from . import views
+
+urlpatterns = []
+
+# public-only workers (a_core.settings_public) don't install the admin, so
+# don't import its URLconf either
+if apps.is_installed('wagtail.admin'):
+    urlpatterns.append(path('cms/', include('wagtail.admin.urls')))
+
+urlpatterns += [
     path('documents/', include(wagtaildocs_urls)),
-    path('search/',article_search, name='article_search'),
+    path('search/', views.article_search, name='article_search'),
+    path('sitemap.xml', views.sitemap_index, name='blog_sitemap'),
+    path('sitemap-<int:chunk>.xml', views.sitemap_chunk, name='blog_sitemap_chunk'),
+    path('feed/rss/', views.rss_feed, name='blog_rss_feed'),
+    path('feed/atom/', views.atom_feed, name='blog_atom_feed'),
     path('', include(wagtail_urls)),
 ]
-
@@ -1,18 +1,58 @@
+from django.http import HttpResponseNotFound, StreamingHttpResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.views import defaults
 
-from .models import ArticlePage
+from . import feeds
+from .listings import highlight, with_excerpts
+from .models import ArticleListing, ArticlePage
 
 # Create your views here.
 def article_search(request):
     search_query = request.GET.get('query','').strip()
     if search_query:
-        articles = ArticlePage.objects.live().search(search_query)
-        articles = sorted(articles, key=attrgetter('first_published_at'),reverse=True)
+        ids = [article.pk for article in ArticlePage.objects.live().only('pk').search(search_query)]
+        articles = with_excerpts(ArticleListing.objects.filter(pk__in=ids), search_query)
+        articles = list(articles.order_by('-first_published_at'))
+        for article in articles:
+            article.excerpt_html = highlight(article, search_query)
     else:
-        articles = ArticlePage.objects.live().order_by('-first_published_at')
+        articles = ArticleListing.objects.order_by('-first_published_at')
     context = {
         'articles': articles,
         'search_query': search_query,
     }
     return render(request, 'a_blog/blog_page.html', context)
 
+
+def sitemap_index(request):
+    stream = feeds.cached_stream(feeds.SITEMAP_INDEX_KEY, feeds.sitemap_index(request))
+    return StreamingHttpResponse(stream, content_type='application/xml')
+
+
+def sitemap_chunk(request, chunk):
+    stream = feeds.cached_stream(feeds.SITEMAP_CHUNK_KEY % chunk, feeds.sitemap_chunk(request, chunk))
+    return StreamingHttpResponse(stream, content_type='application/xml')
+
+
+def rss_feed(request):
+    stream = feeds.cached_stream(feeds.FEED_KEY % 'rss', feeds.rss_feed(request))
+    return StreamingHttpResponse(stream, content_type='application/rss+xml; charset=utf-8')
+
+
+def atom_feed(request):
+    stream = feeds.cached_stream(feeds.FEED_KEY % 'atom', feeds.atom_feed(request))
+    return StreamingHttpResponse(stream, content_type='application/atom+xml; charset=utf-8')
+
+
+_not_found_body = None
+
+
+def page_not_found(request, exception):
+    # anonymous 404s (bots probing /wp-admin, stale links) get a body rendered once per process
+    global _not_found_body
+    if request.user.is_authenticated:
+        return defaults.page_not_found(request, exception)
+    if _not_found_body is None:
+        _not_found_body = render_to_string('404.html')
+    return HttpResponseNotFound(_not_found_body)
@@ -0,0 +1,9 @@
+from wagtail import hooks
+
+from .embeds import LazyMediaEmbedHandler
+
+
+@hooks.register('register_rich_text_features')
+def register_lazy_embed_type(features):
+    # replaces wagtail.embeds' handler, which is registered earlier in INSTALLED_APPS order
+    features.register_embed_type(LazyMediaEmbedHandler)
@@ -0,0 +1,119 @@
+"""
+Session engine that keeps every session in the cache and only writes
+authenticated sessions through to the database.
+
+Anonymous readers (article view flags, allauth's pre-login state) live in
+the cache alone, so they never touch django_session. Authenticated
+sessions are written through whenever their data changes; saves that only
+refresh the expiry are written at most once per
+SESSION_WRITE_BEHIND_INTERVAL per session key. Expired rows are purged in
+batches from a background thread.
+
+The cache must be shared by all workers (Redis, or the file cache on a
+single host): a per-process LocMemCache would keep a logged-out session
+alive on other workers, so it is refused.
+"""
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, connections, router
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'a_core.sessions'
+PURGE_KEY = 'a_core.sessions:purge'
+
+WRITE_BEHIND_INTERVAL = getattr(settings, 'SESSION_WRITE_BEHIND_INTERVAL', 60)
+PURGE_INTERVAL = getattr(settings, 'SESSION_PURGE_INTERVAL', 60 * 60)
+PURGE_BATCH_SIZE = 1000
+
+
+def check_session_cache():
+    if isinstance(caches[settings.SESSION_CACHE_ALIAS], LocMemCache):
+        raise ImproperlyConfigured(
+            f"{__name__} needs a cache shared by all workers; the '{settings.SESSION_CACHE_ALIAS}' "
+            "cache is a per-process LocMemCache."
+        )
+
+
+check_session_cache()
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def exists(self, session_key):
+        # only persisted sessions are in the database, and those are always
+        # mirrored in the cache, so new keys never need a database check
+        return bool(session_key) and (self.cache_key_prefix + session_key) in self._cache
+
+    def create(self):
+        while True:
+            self._session_key = self._get_new_session_key()
+            # cache.add is atomic, so it doubles as the uniqueness check
+            if self._cache.add(self.cache_key, {}, self.get_expiry_age()):
+                break
+        self.save(must_create=True)
+        self.modified = True
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        self._cache.set(self.cache_key, data, self.get_expiry_age())
+        if SESSION_KEY not in data:
+            return
+        # the marker holds a digest of the last persisted data and expires
+        # after the interval, so changes are written at once and unchanged
+        # sessions only to refresh their expiry
+        digest = hashlib.sha256(self.serializer().dumps(data)).hexdigest()
+        marker = self.cache_key + ':persisted'
+        if self._cache.get(marker) != digest:
+            self.persist(data)
+            self._cache.set(marker, digest, WRITE_BEHIND_INTERVAL)
+
+    def persist(self, data):
+        obj = self.create_model_instance(data)
+        obj.save(using=router.db_for_write(self.model, instance=obj))
+        self.schedule_purge()
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        session_key = session_key or self.session_key
+        if session_key:
+            self._cache.delete(self.cache_key_prefix + session_key + ':persisted')
+
+    @classmethod
+    def schedule_purge(cls):
+        if cache.add(PURGE_KEY, True, PURGE_INTERVAL):
+            threading.Thread(target=cls.purge_in_background, daemon=True).start()
+
+    @classmethod
+    def purge_in_background(cls):
+        try:
+            cls.clear_expired()
+        except DatabaseError:
+            # e.g. SQLite's table lock while a request is writing; retried
+            # by the next login after PURGE_INTERVAL
+            logger.warning('Purging expired sessions failed', exc_info=True)
+        finally:
+            connections.close_all()
+
+    @classmethod
+    def clear_expired(cls):
+        # small batches keep each delete's lock short on a busy table
+        model = cls.get_model_class()
+        now = timezone.now()
+        while True:
+            pks = list(model.objects.filter(expire_date__lt=now).values_list('pk', flat=True)[:PURGE_BATCH_SIZE])
+            if not pks:
+                break
+            model.objects.filter(pk__in=pks).delete()
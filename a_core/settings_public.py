@@ -0,0 +1,21 @@
+"""
+Settings for public-facing workers.
+
+Same as a_core.settings minus the apps only editors use, so these workers
+skip importing the Django and Wagtail admin and their URLconfs. Point the
+public WSGI/ASGI processes at it with
+DJANGO_SETTINGS_MODULE=a_core.settings_public and keep the full settings
+for the CMS workers and for migrations. Compare the two with
+`manage.py profile_imports --settings-module a_core.settings_public`.
+"""
+from .settings import *
+
+ADMIN_ONLY_APPS = [
+    'django.contrib.admin',
+    'wagtail.contrib.forms',
+    'wagtail.users',
+    'wagtail.snippets',
+    'wagtail.admin',
+]
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in ADMIN_ONLY_APPS]
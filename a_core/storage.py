@@ -0,0 +1,69 @@
+"""
+Content-addressed media storage.
+
+Images, renditions and avatars are stored as <upload dir>/<ab>/<sha256><ext>,
+so uploading the same image or avatar twice keeps a single copy on disk.
+Other uploads, such as documents, keep their names, since those are shown
+to readers. Deleting a name only removes the file once no row in REFERENCES
+points at it any more, which keeps django_cleanup and Wagtail's file
+cleanup safe for shared files.
+"""
+import hashlib
+import os
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+
+# (model label, file field) pairs that may point at media files
+REFERENCES = [
+    ('wagtailimages.Image', 'file'),
+    ('wagtailimages.Rendition', 'file'),
+    ('wagtaildocs.Document', 'file'),
+    ('a_users.Profile', 'image'),
+]
+
+# upload directories of the fields above whose files are content-addressed
+HASHED_DIRECTORIES = {'original_images', 'images', 'avatars'}
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    directory, filename = os.path.split(name)
+    extension = os.path.splitext(filename)[1].lower()
+    return os.path.join(directory, digest[:2], digest + extension)
+
+
+def reference_count(name):
+    count = 0
+    for label, field in REFERENCES:
+        model = apps.get_model(label)
+        count += model._default_manager.filter(**{field: name}).count()
+    return count
+
+
+def is_hashed(name):
+    return name.replace('\\', '/').split('/', 1)[0] in HASHED_DIRECTORIES
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def _save(self, name, content):
+        if not is_hashed(name):
+            return super()._save(name, content)
+        name = hashed_name(name, content_hash(content))
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+    def delete(self, name):
+        if name and (not is_hashed(name) or reference_count(name) == 0):
+            super().delete(name)
@@ -14,15 +14,19 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 from a_users.views import profile_view
-from a_home.views import *
 
-urlpatterns = [
-    path('admin/', admin.site.urls),
+urlpatterns = []
+
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+urlpatterns += [
     path('accounts/', include('allauth.urls')),
     path('', include('a_home.urls')),
     path('profile/', include('a_users.urls')),
@@ -30,6 +34,8 @@ urlpatterns = [
     path('blog/', include('a_blog.urls')),
 ]
 
+handler404 = 'a_blog.views.page_not_found'
+
 # Only used when DEBUG=True, whitenoise can serve files when DEBUG=False
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)